@@ -1,6 +1,8 @@
 from scrapers.xiaohongshu_scraper import XiaohongshuScraper
 from scrapers.weibo_scraper import WeiboScraper
 from scrapers.douyin_scraper import DouyinScraper
+from scrapers.weibo_text import add_clean_text
+from scrapers.campaign import run_campaign
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -10,6 +12,7 @@ import jieba
 import jieba.analyse
 from collections import Counter
 import numpy as np
+import sys
 
 class SocialMediaAnalyzer:
     def __init__(self):
@@ -24,10 +27,10 @@ class SocialMediaAnalyzer:
         爬取所有平台的数据
         """
         print("开始爬取小红书数据...")
-        xhs_df = self.xhs_scraper.scrape_and_save(keyword)
+        xhs_df = pd.DataFrame(self.xhs_scraper.scrape_and_save(keyword))
         
         print("\n开始爬取微博数据...")
-        weibo_df = self.weibo_scraper.scrape_and_save(keyword)
+        weibo_df = self.weibo_scraper.scrape_and_save(keyword, return_df=True)
         
         print("\n开始爬取抖音数据...")
         douyin_df = self.douyin_scraper.scrape_and_save(keyword)
@@ -47,9 +50,9 @@ class SocialMediaAnalyzer:
             xhs_stats = {
                 '平台': '小红书',
                 '内容数量': len(xhs_df),
-                '平均点赞': xhs_df['likes'].mean(),
-                '平均评论': xhs_df['comments'].mean(),
-                '平均收藏': xhs_df['collects'].mean() if 'collects' in xhs_df.columns else 0
+                '平均点赞': xhs_df['点赞数'].mean(),
+                '平均评论': xhs_df['评论数'].mean(),
+                '平均收藏': xhs_df['收藏数'].mean() if '收藏数' in xhs_df.columns else 0
             }
             platform_stats.append(xhs_stats)
             
@@ -57,9 +60,9 @@ class SocialMediaAnalyzer:
             weibo_stats = {
                 '平台': '微博',
                 '内容数量': len(weibo_df),
-                '平均点赞': weibo_df['attitudes_count'].mean(),
-                '平均评论': weibo_df['comments_count'].mean(),
-                '平均转发': weibo_df['reposts_count'].mean()
+                '平均点赞': weibo_df['点赞数'].mean(),
+                '平均评论': weibo_df['评论数'].mean(),
+                '平均转发': weibo_df['转发数'].mean()
             }
             platform_stats.append(weibo_stats)
             
@@ -67,9 +70,9 @@ class SocialMediaAnalyzer:
             douyin_stats = {
                 '平台': '抖音',
                 '内容数量': len(douyin_df),
-                '平均点赞': douyin_df['likes'].mean(),
-                '平均评论': douyin_df['comments'].mean(),
-                '平均分享': douyin_df['shares'].mean()
+                '平均点赞': douyin_df['点赞数'].mean(),
+                '平均评论': douyin_df['评论数'].mean(),
+                '平均收藏': douyin_df['收藏数'].mean()
             }
             platform_stats.append(douyin_stats)
         
@@ -126,14 +129,19 @@ class SocialMediaAnalyzer:
         
         # 收集所有文本内容
         if xhs_df is not None and not xhs_df.empty:
-            all_content.extend(xhs_df['title'].tolist())
-            all_content.extend(xhs_df['desc'].tolist())
+            all_content.extend(xhs_df['标题'].tolist())
+            # 正文由详情补全阶段填充
+            if '正文' in xhs_df.columns:
+                all_content.extend(xhs_df['正文'].tolist())
             
         if weibo_df is not None and not weibo_df.empty:
-            all_content.extend(weibo_df['content'].tolist())
+            # 使用清洗后的纯文本，避免HTML标签和链接混入分词
+            if '纯文本' not in weibo_df.columns:
+                weibo_df = add_clean_text(weibo_df.copy())
+            all_content.extend(weibo_df['纯文本'].tolist())
             
         if douyin_df is not None and not douyin_df.empty:
-            all_content.extend(douyin_df['title'].tolist())
+            all_content.extend(douyin_df['标题'].tolist())
         
         # 提取关键词
         text = ' '.join([str(content) for content in all_content if pd.notna(content)])
@@ -222,7 +230,15 @@ class SocialMediaAnalyzer:
         print(f"\n分析报告已生成：{report_file}")
 
 def main():
-    keyword = "哈尔滨冰雪大世界"
+    # 命令行传入多个关键词时，按 关键词×平台 分发到进程池批量爬取
+    keywords = sys.argv[1:]
+    if len(keywords) > 1:
+        summary_df = run_campaign(keywords)
+        print("\n=== 批量爬取摘要 ===")
+        print(summary_df[['平台', '关键词', '记录数', '状态', '耗时(秒)']].to_string(index=False))
+        return
+
+    keyword = keywords[0] if keywords else "哈尔滨冰雪大世界"
     analyzer = SocialMediaAnalyzer()
     
     # 爬取数据
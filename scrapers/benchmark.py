@@ -0,0 +1,144 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    from scrapers.mock_weibo_server import MockWeiboServer
+    from scrapers.weibo_scraper_full import WeiboScraper
+    from scrapers.sinks import CsvSink
+except ImportError:  # 直接以脚本方式运行时
+    from mock_weibo_server import MockWeiboServer
+    from weibo_scraper_full import WeiboScraper
+    from sinks import CsvSink
+
+
+def _serve(server_options, ready):
+    """在子进程中运行模拟接口，测得的峰值内存只包含爬虫本身"""
+    server = MockWeiboServer(**server_options).start()
+    ready.put(server.url)
+    while True:
+        time.sleep(3600)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows 没有 resource 模块
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def run_benchmark(pages=50, concurrency=None, latency=0.05, jitter=0.01, error_rate=0.0,
+                  throttle_rate=0.0, end_behavior='last_page', pages_per_minute=6000,
+                  expand_long_text=True, shards=None):
+    """
+    启动模拟接口，用 WeiboScraper.scrape_and_save 完整爬取一遍并返回测量结果
+    参数:
+        pages: 模拟接口有数据的页数
+        concurrency: 传给 scrape_and_save 的并发数，None 为串行模式
+        pages_per_minute: 爬虫的初始速率和速率上限，默认足够大，使结果反映流水线本身的开销
+        shards: 分片数，设置后把关键词拆成若干子查询并发爬取
+        其余参数见 MockWeiboServer
+    """
+    server_options = {'total_pages': pages, 'latency': latency, 'jitter': jitter,
+                      'error_rate': error_rate, 'throttle_rate': throttle_rate,
+                      'end_behavior': end_behavior}
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(server_options, ready), daemon=True)
+    server.start()
+    try:
+        url = ready.get(timeout=30)
+        with tempfile.TemporaryDirectory() as tmp:
+            scraper = WeiboScraper(pages_per_minute=pages_per_minute,
+                                   max_pages_per_minute=pages_per_minute,
+                                   burst=max(1, concurrency or 1),
+                                   expand_long_text=expand_long_text)
+            scraper.search_url = f"{url}/api/container/getIndex"
+            scraper.long_text_url = f"{url}/statuses/extend"
+            scraper.data_path = tmp
+            scraper.checkpoint_path = os.path.join(tmp, "checkpoints")
+            # 身份池在计时开始前加载
+            len(scraper.identity_pool)
+
+            latencies = []
+            request_page = scraper._request_page
+
+            def timed_request_page(keyword, page):
+                started = time.perf_counter()
+                try:
+                    return request_page(keyword, page)
+                finally:
+                    latencies.append(time.perf_counter() - started)
+
+            scraper._request_page = timed_request_page
+            sink = CsvSink(os.path.join(tmp, "benchmark.csv"))
+            shard_queries = [f"benchmark {i}" for i in range(shards)] if shards else None
+
+            started = time.perf_counter()
+            scraper.scrape_and_save("benchmark", concurrency=concurrency, sinks=[sink],
+                                    return_df=False, shards=shard_queries)
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.join()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'pages': len(latencies),
+        'records': sink.count,
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(len(latencies) / elapsed, 2),
+        'records_per_second': round(sink.count / elapsed, 2),
+        'latency_p50_ms': round(float(np.percentile(latencies_ms, 50)), 1) if latencies else None,
+        'latency_p99_ms': round(float(np.percentile(latencies_ms, 99)), 1) if latencies else None,
+        'peak_rss_mb': _peak_rss_mb(),
+        'final_rate_per_minute': scraper.rate_controller.stats()['rate_per_minute'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用本地模拟接口测量微博爬虫的吞吐量")
+    parser.add_argument('--pages', type=int, default=50, help="模拟接口有数据的页数")
+    parser.add_argument('--concurrency', type=int, default=None, help="并发数，不设置为串行模式")
+    parser.add_argument('--shards', type=int, default=None, help="分片数")
+    parser.add_argument('--latency', type=float, default=0.05, help="每个响应的延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.01, help="响应延迟的随机抖动（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回500的概率")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="返回418的概率")
+    parser.add_argument('--end', choices=('last_page', 'empty'), default='last_page',
+                        help="分页结束方式")
+    parser.add_argument('--pages-per-minute', type=float, default=6000, help="爬虫速率上限")
+    parser.add_argument('--no-long-text', action='store_true', help="不补全长微博全文")
+    parser.add_argument('--json', action='store_true', help="以JSON格式输出结果")
+    parser.add_argument('--verbose', action='store_true', help="输出爬虫的逐页日志")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    result = run_benchmark(pages=args.pages, concurrency=args.concurrency, latency=args.latency,
+                           jitter=args.jitter, error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate, end_behavior=args.end,
+                           pages_per_minute=args.pages_per_minute,
+                           expand_long_text=not args.no_long_text, shards=args.shards)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    print("\n=== 基准测试结果 ===")
+    print(f"页面请求数: {result['pages']}，记录数: {result['records']}，耗时: {result['seconds']} 秒")
+    print(f"吞吐量: {result['pages_per_second']} 页/秒，{result['records_per_second']} 条/秒")
+    print(f"请求延迟: p50 {result['latency_p50_ms']} ms，p99 {result['latency_p99_ms']} ms")
+    print(f"峰值内存: {result['peak_rss_mb']} MB，最终速率: {result['final_rate_per_minute']} 页/分钟")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# 只需要文本和互动数，图片、视频、字体和统计脚本都不必下载
+BLOCKED_URL_PATTERNS = [
+    # 图片
+    '*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.ico*', '*.svg*',
+    # 音视频
+    '*.mp4*', '*.m4s*', '*.m3u8*', '*.flv*', '*.webm*', '*.mp3*', '*.m4a*',
+    # 字体
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    # 统计和监控
+    '*google-analytics.com*', '*googletagmanager.com*', '*hm.baidu.com*', '*cnzz.com*',
+    '*mcs.snssdk.com*', '*mon.zijieapi.com*', '*apm-fe.xiaohongshu.com*',
+    '*t2.xiaohongshu.com*', '*sentry*',
+]
+
+
+def apply_lean_options(options, headless=True, renderer_memory_mb=512):
+    """
+    轻量浏览器配置，需在创建 driver 前调用
+    参数:
+        headless: 是否使用无头模式
+        renderer_memory_mb: 渲染进程 JavaScript 堆的上限（MB）
+    """
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1366,900')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--mute-audio')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_argument(f'--js-flags=--max-old-space-size={renderer_memory_mb}')
+    options.add_argument('--renderer-process-limit=2')
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.managed_default_content_settings.media_stream': 2,
+    })
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """通过 CDP 让浏览器直接拒绝匹配的请求，需在打开页面前调用"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
@@ -0,0 +1,181 @@
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    from scrapers.sinks import SegmentSink, CsvSink, iter_segment_records
+except ImportError:  # 直接以脚本方式运行时
+    from sinks import SegmentSink, CsvSink, iter_segment_records
+
+logger = logging.getLogger("Campaign")
+
+PLATFORMS = ('weibo', 'xiaohongshu', 'douyin')
+# 各平台同时运行的任务数上限：浏览器平台每个任务占用一个Chrome实例
+DEFAULT_PLATFORM_LIMITS = {'weibo': 2, 'xiaohongshu': 1, 'douyin': 1}
+# 所有微博任务合计的请求速率（页/分钟），按微博的并发上限平分给各个进程
+DEFAULT_WEIBO_PAGES_PER_MINUTE = 40
+# 单个微博进程自适应速率的默认下限（页/分钟）
+WEIBO_MIN_PAGES_PER_MINUTE = 3
+
+
+def _create_scraper(platform, options):
+    """
+    在子进程中按需导入并创建爬虫，避免主进程加载 selenium 等依赖；
+    进程池的工作进程会被复用，浏览器平台共用进程内的 driver 池，后续任务不再重新启动浏览器，
+    工作进程退出时由 driver 池的退出钩子关闭浏览器。
+    工作进程没有终端，浏览器平台一律使用无头模式，不会等待手动登录
+    """
+    try:
+        if platform == 'weibo':
+            from scrapers.weibo_scraper_full import WeiboScraper
+            return WeiboScraper(**options['weibo_rate'])
+        from scrapers.driver_pool import get_default_driver_pool
+        if platform == 'xiaohongshu':
+            from scrapers.xiaohongshu_scraper import XiaohongshuScraper
+            return XiaohongshuScraper(headless=True, driver_pool=get_default_driver_pool())
+        if platform == 'douyin':
+            from scrapers.douyin_scraper import DouyinScraper
+            return DouyinScraper(headless=True, driver_pool=get_default_driver_pool())
+    except ImportError:  # 直接以脚本方式运行时
+        if platform == 'weibo':
+            from weibo_scraper_full import WeiboScraper
+            return WeiboScraper(**options['weibo_rate'])
+        from driver_pool import get_default_driver_pool
+        if platform == 'xiaohongshu':
+            from xiaohongshu_scraper import XiaohongshuScraper
+            return XiaohongshuScraper(headless=True, driver_pool=get_default_driver_pool())
+        if platform == 'douyin':
+            from douyin_scraper import DouyinScraper
+            return DouyinScraper(headless=True, driver_pool=get_default_driver_pool())
+    raise ValueError(f"不支持的平台: {platform}")
+
+
+def run_job(platform, keyword, segment_dir, options):
+    """
+    在子进程中运行一个 关键词×平台 任务，数据写入该任务自己的分段目录，
+    返回任务摘要；任务出错不会影响其他任务。
+    浏览器平台没有有效的登录会话时直接失败，需要先单独运行一次该平台的爬虫手动登录；
+    没有获取到任何记录的任务同样记为失败
+    """
+    started = time.time()
+    summary = {'平台': platform, '关键词': keyword, '记录数': 0, '状态': '成功',
+               '错误': '', '耗时(秒)': 0.0, '分段目录': segment_dir}
+    segments = SegmentSink(segment_dir)
+    try:
+        scraper = _create_scraper(platform, options)
+        if platform == 'weibo':
+            # 微博记录直接流式写入分段
+            scraper.scrape_and_save(keyword, max_pages=options['max_pages'],
+                                    sinks=[segments], return_df=False)
+        else:
+            if scraper.session_store.load() is None:
+                raise RuntimeError(f"没有有效的登录会话（{scraper.session_store.path}），"
+                                   f"请先单独运行一次爬虫手动登录")
+            # 浏览器爬虫把记录直接写入任务的分段，不再另存自己的Excel
+            with segments:
+                scraper.scrape_and_save(keyword, segments=segments)
+        summary['记录数'] = segments.count
+        if not segments.count:
+            summary['状态'] = '失败'
+            summary['错误'] = "未获取到任何记录"
+    except Exception as e:
+        summary['状态'] = '失败'
+        summary['错误'] = f"{type(e).__name__}: {e}"
+    summary['耗时(秒)'] = round(time.time() - started, 1)
+    return summary
+
+
+def merge_campaign(campaign_dir, summaries):
+    """
+    合并所有任务的分段：每个平台输出一个带"关键词"列的CSV，
+    并把任务摘要保存为 summary.csv，返回摘要 DataFrame
+    """
+    summary_df = pd.DataFrame(summaries)
+    for platform, jobs in summary_df[summary_df['记录数'] > 0].groupby('平台', sort=False):
+        path = os.path.join(campaign_dir, f"{platform}_merged.csv")
+        with CsvSink(path) as sink:
+            for _, job in jobs.iterrows():
+                for record in iter_segment_records(job['分段目录']):
+                    sink.write({'关键词': job['关键词'], **record})
+
+    summary_df.to_csv(os.path.join(campaign_dir, "summary.csv"), index=False, encoding='utf-8-sig')
+    return summary_df
+
+
+def run_campaign(keywords, platforms=PLATFORMS, platform_limits=None, max_workers=None,
+                 output_dir="data/campaigns", weibo_pages_per_minute=DEFAULT_WEIBO_PAGES_PER_MINUTE,
+                 max_pages=None):
+    """
+    多关键词爬取：把 关键词×平台 任务分发到进程池，每个平台同时运行的任务数不超过上限
+    参数:
+        keywords: 关键词列表
+        platforms: 要爬取的平台
+        platform_limits: 各平台的并发上限，覆盖 DEFAULT_PLATFORM_LIMITS 中的对应项
+        max_workers: 进程数，默认取CPU核数与各平台上限之和中的较小值
+        output_dir: 输出目录，每次运行在其下新建以时间命名的子目录
+        weibo_pages_per_minute: 所有微博任务合计的请求速率，平分后同时作为各进程自适应速率的上限
+        max_pages: 每个微博任务的最大页数，None表示不限
+    返回: 任务摘要 DataFrame
+    """
+    if not keywords:
+        raise ValueError("关键词列表为空")
+    limits = dict(DEFAULT_PLATFORM_LIMITS, **(platform_limits or {}))
+    max_workers = max_workers or min(os.cpu_count() or 1, sum(limits[p] for p in platforms))
+    campaign_dir = os.path.join(output_dir, datetime.now().strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(campaign_dir, exist_ok=True)
+    # 自适应速率只能在各进程的份额内调整，合计速率不会超出预算
+    weibo_rate = weibo_pages_per_minute / min(limits['weibo'], max_workers)
+    options = {
+        'weibo_rate': {
+            'pages_per_minute': weibo_rate,
+            'min_pages_per_minute': min(WEIBO_MIN_PAGES_PER_MINUTE, weibo_rate),
+            'max_pages_per_minute': weibo_rate,
+        },
+        'max_pages': max_pages,
+    }
+
+    # 平台交替排列，让各平台的任务同时推进
+    pending = [(platform, keyword) for keyword in keywords for platform in platforms]
+    running = {}
+    active = Counter()
+    summaries = []
+    logger.info(f"开始爬取 {len(keywords)} 个关键词、{len(pending)} 个任务，进程数 {max_workers}，"
+                f"输出目录: {campaign_dir}")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for job in list(pending):
+                if len(running) >= max_workers:
+                    break
+                platform, keyword = job
+                if active[platform] >= limits[platform]:
+                    continue
+                pending.remove(job)
+                active[platform] += 1
+                segment_dir = os.path.join(campaign_dir, "segments", f"{platform}_{keyword}")
+                future = executor.submit(run_job, platform, keyword, segment_dir, options)
+                running[future] = job
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                platform, keyword = running.pop(future)
+                active[platform] -= 1
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    # 子进程异常退出
+                    summary = {'平台': platform, '关键词': keyword, '记录数': 0, '状态': '失败',
+                               '错误': f"{type(e).__name__}: {e}", '耗时(秒)': 0.0, '分段目录': ''}
+                summaries.append(summary)
+                logger.info(f"[{len(summaries)}/{len(summaries) + len(pending) + len(running)}] "
+                            f"{platform} - {keyword}: {summary['状态']}，{summary['记录数']} 条，"
+                            f"耗时 {summary['耗时(秒)']} 秒")
+
+    summary_df = merge_campaign(campaign_dir, summaries)
+    logger.info(f"全部任务完成，共 {int(summary_df['记录数'].sum())} 条记录，摘要已保存到: {campaign_dir}")
+    return summary_df
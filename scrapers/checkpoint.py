@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger("CrawlCheckpoint")
+
+
+def atomic_write_json(path, obj):
+    """先写临时文件再原子替换，进程中途退出也不会留下写了一半的文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CrawlCheckpoint:
+    """
+    可恢复的爬取断点
+    - 断点文件（JSON）记录关键词、最后连续完成的页码、已见微博ID和速率控制器状态，原子写入
+    - 已解析的记录逐页追加到同名的 .records.jsonl 文件中，恢复时读回
+    并发模式下页面可能乱序完成，last_page 只推进到连续完成的最大页码，
+    更靠后的已完成页单独记录，恢复时跳过；请求失败的页不算完成，恢复时重新请求
+    """
+    def __init__(self, path, keyword):
+        self.path = path
+        self.records_path = f"{path}.records.jsonl"
+        self.keyword = keyword
+        self.last_page = 0
+        self.completed_pages = set()  # last_page 之后已完成的页
+        self.failed_pages = set()  # 本次运行中请求失败、尚未完成的页
+        self.seen_ids = set()
+        self.controller_state = None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    @classmethod
+    def load(cls, path):
+        """读取断点，文件不存在时返回 None"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        checkpoint = cls(path, state['keyword'])
+        checkpoint.last_page = state.get('last_page', 0)
+        checkpoint.completed_pages = set(state.get('completed_pages', []))
+        checkpoint.seen_ids = set(state.get('seen_ids', []))
+        checkpoint.controller_state = state.get('controller_state')
+        return checkpoint
+
+    def is_page_done(self, page):
+        return page <= self.last_page or page in self.completed_pages
+
+    def mark_failed(self, page):
+        """记录一页请求失败：不推进 last_page，有失败页时爬取结束后保留断点"""
+        self.failed_pages.add(page)
+
+    def mark_page(self, page, records):
+        """
+        记录一页已完成：过滤掉已见过的微博，把新记录追加到记录文件
+        返回过滤后的新记录
+        """
+        new_records = []
+        for record in records:
+            weibo_id = str(record.get('微博ID', ''))
+            if weibo_id and weibo_id in self.seen_ids:
+                continue
+            if weibo_id:
+                self.seen_ids.add(weibo_id)
+            new_records.append(record)
+
+        if new_records:
+            with open(self.records_path, 'a', encoding='utf-8') as f:
+                for record in new_records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.failed_pages.discard(page)
+        self.completed_pages.add(page)
+        while self.last_page + 1 in self.completed_pages:
+            self.last_page += 1
+            self.completed_pages.discard(self.last_page)
+        return new_records
+
+    def save(self, controller=None):
+        if controller is not None:
+            self.controller_state = controller.state()
+        atomic_write_json(self.path, {
+            'keyword': self.keyword,
+            'last_page': self.last_page,
+            'completed_pages': sorted(self.completed_pages),
+            'seen_ids': sorted(self.seen_ids),
+            'controller_state': self.controller_state,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        })
+
+    def iter_records(self):
+        """
+        逐条读回已保存的记录并按微博ID去重，不会一次性载入内存。
+        记录先于断点写入，因此记录文件中可能有断点尚未包含的ID，一并加入 seen_ids
+        """
+        if not os.path.exists(self.records_path):
+            return
+        loaded_ids = set()
+        with open(self.records_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程中途退出时最后一行可能不完整
+                    logger.warning("跳过不完整的断点记录行")
+                    continue
+                weibo_id = str(record.get('微博ID', ''))
+                if weibo_id and weibo_id in loaded_ids:
+                    continue
+                if weibo_id:
+                    loaded_ids.add(weibo_id)
+                    self.seen_ids.add(weibo_id)
+                yield record
+
+    def clear(self):
+        """爬取完成后删除断点文件"""
+        for path in (self.path, self.records_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class MemoryCheckpoint(CrawlCheckpoint):
+    """只在内存中去重、不落盘的断点，用于不需要恢复的流式爬取"""
+    def __init__(self, keyword=""):
+        self.path = None
+        self.records_path = None
+        self.keyword = keyword
+        self.last_page = 0
+        self.completed_pages = set()
+        self.failed_pages = set()
+        self.seen_ids = set()
+        self.controller_state = None
+
+    def mark_page(self, page, records):
+        new_records = []
+        for record in records:
+            weibo_id = str(record.get('微博ID', ''))
+            if weibo_id and weibo_id in self.seen_ids:
+                continue
+            if weibo_id:
+                self.seen_ids.add(weibo_id)
+            new_records.append(record)
+        self.failed_pages.discard(page)
+        self.completed_pages.add(page)
+        return new_records
+
+    def save(self, controller=None):
+        pass
+
+    def iter_records(self):
+        return iter(())
+
+    def clear(self):
+        pass
@@ -0,0 +1,82 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+# 抖音搜索 publish_time 参数可选的时间窗口（天），0 表示不限
+DOUYIN_PUBLISH_WINDOWS = (1, 7, 182)
+
+# 按时间排序时连续多少条早于开始日期才认为已越过范围，置顶或推广内容不会触发
+STOP_AFTER_BEFORE = 5
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+class DateRange:
+    """
+    发布日期范围过滤，start / end 为 'YYYY-MM-DD' 字符串或 datetime，None 表示不限；
+    end 当天整天都在范围内
+    同时统计每轮判断过的日期落在范围之前、之内、之后的数量，以及连续早于范围的条数，
+    供爬虫在按时间排序时判断是否提前结束
+    """
+    def __init__(self, start=None, end=None, stop_after=STOP_AFTER_BEFORE):
+        self.start = _to_datetime(start)
+        self.end = _to_datetime(end)
+        self._end_exclusive = self.end + timedelta(days=1) if self.end else None
+        if self.start and self.end and self.start > self.end:
+            raise ValueError(f"开始日期晚于结束日期: {start} > {end}")
+        self.stop_after = stop_after
+        self.counts = Counter()
+        self.consecutive_before = 0
+
+    @property
+    def bounded(self):
+        return self.start is not None or self.end is not None
+
+    def position(self, date):
+        """-1 表示早于范围，0 表示在范围内，1 表示晚于范围，并计入本轮统计"""
+        if self.start is not None and date < self.start:
+            result = -1
+        elif self._end_exclusive is not None and date >= self._end_exclusive:
+            result = 1
+        else:
+            result = 0
+        self.counts[result] += 1
+        if result == -1:
+            self.consecutive_before += 1
+        elif result == 0:
+            self.consecutive_before = 0
+        return result
+
+    def reset_counts(self):
+        """返回并清空本轮统计"""
+        counts, self.counts = self.counts, Counter()
+        return counts
+
+    def restart(self):
+        """开始新一次采集时清空本轮统计和连续计数"""
+        self.counts = Counter()
+        self.consecutive_before = 0
+
+    def passed_start(self, counts):
+        """
+        按时间排序时判断信息流是否已越过开始日期：连续 stop_after 条早于范围，
+        或一整轮没有范围内的内容且出现了更早的内容；counts 为 reset_counts 返回的本轮统计
+        """
+        if self.consecutive_before >= self.stop_after:
+            return True
+        return bool(counts[-1]) and not counts[0]
+
+    def describe(self):
+        start = self.start.strftime('%Y-%m-%d') if self.start else "不限"
+        end = self.end.strftime('%Y-%m-%d') if self.end else "不限"
+        return f"{start} 至 {end}"
+
+    def douyin_publish_time(self, now=None):
+        """抖音搜索能覆盖开始日期的最小 publish_time 窗口，开始日期太早或不限时返回 0"""
+        if self.start is None:
+            return 0
+        days = ((now or datetime.now()) - self.start).days + 1
+        return next((window for window in DOUYIN_PUBLISH_WINDOWS if days <= window), 0)
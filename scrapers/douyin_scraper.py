@@ -4,7 +4,6 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 import time
-import random
 import pandas as pd
 from datetime import datetime, timedelta
 import os
@@ -12,8 +11,46 @@ import threading
 import sys
 import re
 
+try:
+    from scrapers.sinks import SegmentSink
+    from scrapers.selector_engine import SelectorEngine
+    from scrapers.scrolling import scroll_for_more
+    from scrapers.browser_profile import apply_lean_options, block_resources
+    from scrapers.session_store import SessionStore
+    from scrapers.date_range import DateRange
+except ImportError:  # 直接以脚本方式运行时
+    from sinks import SegmentSink
+    from selector_engine import SelectorEngine
+    from scrolling import scroll_for_more
+    from browser_profile import apply_lean_options, block_resources
+    from session_store import SessionStore
+    from date_range import DateRange
+
+# 视频卡片的候选选择器
+VIDEO_CARD_SELECTORS = [
+    '.douyin-search-card', 
+    '.search-result-card',
+    '.video-card',
+    '[data-e2e="searchcard-item"]',
+    '.search_card_video'
+]
+TITLE_SELECTORS = [
+    '.title', '.desc', '[data-e2e="video-desc"]', 
+    '.video-title', '.video-name', 'h1', 
+    '.search-card-title'
+]
+AUTHOR_SELECTORS = [
+    '.author', '.nickname', '[data-e2e="video-author"]',
+    '.user-name', '.creator-name', '.account'
+]
+TIME_SELECTORS = [
+    '.time', '.date', '[data-e2e="video-create-time"]',
+    '.publish-time', '.video-time'
+]
+
 class DouyinScraper:
-    def __init__(self):
+    def __init__(self, lean=False, headless=None, session_store=None, driver_pool=None,
+                 start_date=None, end_date=None, sort_by_time=False):
         self.chrome_options = Options()
         # self.chrome_options.add_argument('--headless')  # 先不使用无头模式，方便调试
         self.chrome_options.add_argument('--no-sandbox')
@@ -29,6 +66,30 @@ class DouyinScraper:
         print(f"数据将保存到: {self.data_path}")
         self.is_running = True
         self.paused = False
+        # 记住各字段上次命中的选择器，下次优先尝试
+        self.selectors = SelectorEngine()
+        self._apply_profile(lean, headless)
+        # 登录会话：扫码登录一次后保存，之后的运行直接注入
+        self.session_store = session_store or SessionStore(
+            'douyin', path=os.path.join(os.path.dirname(self.data_path), "sessions", "douyin.json"))
+        # driver 池：多个关键词复用已启动的浏览器，不设置时每次爬取新建并关闭浏览器
+        self.driver_pool = driver_pool
+        # 发布日期范围：开始日期通过搜索参数 publish_time 下推给抖音，
+        # 范围外的视频在读取其他字段之前跳过；sort_by_time 时按最新发布排序，越过开始日期后停止
+        self.date_range = DateRange(start_date, end_date)
+        self.sort_by_time = sort_by_time
+
+    def _apply_profile(self, lean, headless):
+        """
+        lean 为 True 时使用轻量配置：拦截图片、视频、字体和统计脚本，限制渲染进程内存，
+        默认同时使用无头模式（无法扫码登录，需要已登录的会话）
+        """
+        self.lean = lean
+        self.headless = lean if headless is None else headless
+        if lean:
+            apply_lean_options(self.chrome_options, headless=self.headless)
+        elif self.headless:
+            self.chrome_options.add_argument('--headless=new')
 
     def init_driver(self):
         driver = webdriver.Chrome(options=self.chrome_options)
@@ -39,9 +100,31 @@ class DouyinScraper:
                 })
             '''
         })
-        driver.implicitly_wait(10)
+        # 不使用隐式等待，否则候选选择器每次未命中都要等待10秒；需要等待的地方使用显式等待
+        driver.implicitly_wait(0)
+        if self.lean:
+            block_resources(driver)
+        # 在打开页面前注入保存的登录会话
+        self.session_store.restore(driver)
         return driver
 
+    def _checkout_driver(self):
+        """从 driver 池取出浏览器，没有池时新建"""
+        if self.driver_pool is None:
+            return self.init_driver()
+        key = f"douyin:lean={self.lean}:headless={self.headless}"
+        driver, reused = self.driver_pool.checkout(key, self.init_driver)
+        if reused:
+            print("复用已启动的浏览器")
+        return driver
+
+    def _release_driver(self, driver, pages, healthy):
+        """归还浏览器到 driver 池，没有池时直接关闭"""
+        if self.driver_pool is not None:
+            self.driver_pool.checkin(driver, pages=pages, healthy=healthy)
+        else:
+            driver.quit()
+
     def keyboard_listener(self):
         while self.is_running:
             try:
@@ -58,56 +141,54 @@ class DouyinScraper:
         try:
             print("\n尝试解析视频数据...")
             
-            # 获取标题
-            title_selectors = [
-                '.title', '.desc', '[data-e2e="video-desc"]', 
-                '.video-title', '.video-name', 'h1', 
-                '.search-card-title'
-            ]
-            
-            title = "未知标题"
-            for selector in title_selectors:
+            # 先获取发布时间，不在日期范围内的视频不再读取其他字段
+            publish_date = datetime.now().strftime('%Y-%m-%d')
+            time_text = self.selectors.text(element, 'time', TIME_SELECTORS, non_empty=True)
+            if time_text:
+                print(f"原始时间文本: {time_text}")
+                date = None
                 try:
-                    title_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    if title_elem and title_elem.text.strip():
-                        title = title_elem.text.strip()
-                        break
-                except:
-                    continue
+                    # 解析时间
+                    if '年' in time_text and '月' in time_text:
+                        date = datetime.strptime(time_text, '%Y年%m月%d日')
+                    elif '天前' in time_text:
+                        days = int(re.search(r'(\d+)', time_text).group(1))
+                        date = datetime.now() - timedelta(days=days)
+                    elif '小时前' in time_text:
+                        hours = int(re.search(r'(\d+)', time_text).group(1))
+                        date = datetime.now() - timedelta(hours=hours)
+                    elif '分钟前' in time_text:
+                        date = datetime.now()
+                except Exception as e:
+                    print(f"解析时间出错: {e}")
+                if date:
+                    if self.date_range.position(date) != 0:
+                        print(f"日期 {date.strftime('%Y-%m-%d')} 不在目标范围内")
+                        return None
+                    publish_date = date.strftime('%Y-%m-%d')
+                print(f"解析后的发布时间: {publish_date}")
+
+            # 获取标题
+            title = self.selectors.text(element, 'title', TITLE_SELECTORS, default="未知标题",
+                                        non_empty=True)
                     
             if title == "未知标题":
                 # 尝试使用XPath
-                try:
-                    title_elem = element.find_element(By.XPATH, ".//*[contains(@class, 'title') or contains(@class, 'desc')]")
-                    title = title_elem.text.strip()
-                except:
-                    pass
+                title_elems = element.find_elements(By.XPATH, ".//*[contains(@class, 'title') or contains(@class, 'desc')]")
+                if title_elems:
+                    title = title_elems[0].text.strip()
                     
             print(f"标题: {title}")
 
             # 获取作者
-            author_selectors = [
-                '.author', '.nickname', '[data-e2e="video-author"]',
-                '.user-name', '.creator-name', '.account'
-            ]
-            
-            author = "未知作者"
-            for selector in author_selectors:
-                try:
-                    author_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    if author_elem and author_elem.text.strip():
-                        author = author_elem.text.strip()
-                        break
-                except:
-                    continue
+            author = self.selectors.text(element, 'author', AUTHOR_SELECTORS, default="未知作者",
+                                         non_empty=True)
                     
             if author == "未知作者":
                 # 尝试使用XPath
-                try:
-                    author_elem = element.find_element(By.XPATH, ".//*[contains(@class, 'author') or contains(@class, 'nickname')]")
-                    author = author_elem.text.strip()
-                except:
-                    pass
+                author_elems = element.find_elements(By.XPATH, ".//*[contains(@class, 'author') or contains(@class, 'nickname')]")
+                if author_elems:
+                    author = author_elems[0].text.strip()
                     
             print(f"作者: {author}")
 
@@ -173,48 +254,13 @@ class DouyinScraper:
                     print(f"处理数字元素时出错: {e}")
                     continue
             
-            # 获取发布时间
-            publish_date = datetime.now().strftime('%Y-%m-%d')
-            time_selectors = [
-                '.time', '.date', '[data-e2e="video-create-time"]',
-                '.publish-time', '.video-time'
-            ]
-            
-            for selector in time_selectors:
-                try:
-                    time_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    if time_elem and time_elem.text.strip():
-                        time_text = time_elem.text.strip()
-                        print(f"原始时间文本: {time_text}")
-                        
-                        # 解析时间
-                        if '年' in time_text and '月' in time_text:
-                            date = datetime.strptime(time_text, '%Y年%m月%d日')
-                            publish_date = date.strftime('%Y-%m-%d')
-                        elif '天前' in time_text:
-                            days = int(re.search(r'(\d+)', time_text).group(1))
-                            date = datetime.now() - timedelta(days=days)
-                            publish_date = date.strftime('%Y-%m-%d')
-                        elif '小时前' in time_text:
-                            hours = int(re.search(r'(\d+)', time_text).group(1))
-                            date = datetime.now() - timedelta(hours=hours)
-                            publish_date = date.strftime('%Y-%m-%d')
-                        elif '分钟前' in time_text:
-                            date = datetime.now()
-                            publish_date = date.strftime('%Y-%m-%d')
-                        
-                        print(f"解析后的发布时间: {publish_date}")
-                        break
-                except:
-                    continue
-
             # 获取视频链接
             link = ""
-            try:
-                link_elem = element.find_element(By.TAG_NAME, 'a')
-                link = link_elem.get_attribute('href')
+            link_elems = element.find_elements(By.TAG_NAME, 'a')
+            if link_elems:
+                link = link_elems[0].get_attribute('href')
                 print(f"视频链接: {link}")
-            except:
+            else:
                 print("未找到视频链接")
 
             return {
@@ -249,57 +295,90 @@ class DouyinScraper:
         except:
             return 0
 
-    def scroll_page(self, driver):
+    def _ensure_login(self, driver):
         """
-        滚动页面加载更多内容
+        已注入（或复用浏览器中）的会话仍然有效时直接继续；否则等待手动登录并保存会话，
+        无头模式下无法手动登录，只给出提示
         """
+        if self.session_store.is_logged_in(driver):
+            print("\n已恢复登录会话，跳过手动登录")
+            return
+        if self.headless:
+            print("\n无头模式且没有可用的登录会话，以未登录状态继续")
+            return
+        print("\n请在浏览器中完成登录")
+        print("1. 使用手机扫描二维码")
+        print("2. 完成可能出现的验证")
+        input("\n完成登录后，按回车键继续...")
         try:
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            while True:
-                # 滚动到页面底部
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(random.uniform(2, 4))
-                
-                # 计算新的滚动高度并与上一个滚动高度进行比较
-                new_height = driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    # 如果高度没有变化，说明已经到底部
-                    break
-                last_height = new_height
-                print("页面滚动中...")
+            self.session_store.save(driver)
+        except Exception as e:
+            print(f"保存登录会话失败: {e}")
+
+    def scroll_page(self, driver, timeout=5):
+        """
+        滚动一次加载更多内容，新视频卡片出现后立即返回，最多等待 timeout 秒
+        返回新加载的卡片数
+        """
+        try:
+            return scroll_for_more(driver, ', '.join(VIDEO_CARD_SELECTORS), timeout=timeout)
         except Exception as e:
             print(f"滚动页面时出错: {e}")
+            return 0
 
-    def scrape_and_save(self, keyword, max_videos=100):
-        driver = self.init_driver()
+    def scrape_and_save(self, keyword, max_videos=100, segments=None):
+        """
+        爬取关键词下的视频并返回 DataFrame；
+        传入 segments 时记录只写入调用方的分段存储，由调用方负责合并，不再另存Excel
+        """
+        driver = self._checkout_driver()
         all_videos = []
-        save_counter = 0
+        pages = 0
+        healthy = True
+        # 每50个视频追加写入一个新分段，只写新记录，结束时再合并为单个Excel
+        external_segments = segments is not None
+        if not external_segments:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            segments = SegmentSink(
+                os.path.join(self.data_path, "segments", f"douyin_{keyword}_{timestamp}"),
+                batch_size=50
+            )
         
         try:
             print("\n开始访问抖音...")
             search_url = f"https://www.douyin.com/search/{keyword}"
+            params = []
+            publish_time = self.date_range.douyin_publish_time()
+            if publish_time:
+                params.append(f"publish_time={publish_time}")
+            if self.sort_by_time:
+                params.append("sort_type=2")  # 最新发布
+            if params:
+                search_url += "?" + "&".join(params)
+            if self.date_range.bounded:
+                print(f"仅收集发布日期在 {self.date_range.describe()} 的视频")
             driver.get(search_url)
-            
-            print("\n请在浏览器中完成登录")
-            print("1. 使用手机扫描二维码")
-            print("2. 完成可能出现的验证")
-            input("\n完成登录后，按回车键继续...")
+            self._ensure_login(driver)
             
             print(f"\n开始搜索关键词：{keyword}")
-            time.sleep(5)  # 等待页面加载
             
-            # 检查是否需要切换到视频标签
+            # 检查是否需要切换到视频标签，最多等待5秒
             try:
-                video_tab = driver.find_element(By.XPATH, "//span[contains(text(), '视频') or contains(text(), 'Videos')]")
+                video_tab = WebDriverWait(driver, 5).until(EC.element_to_be_clickable(
+                    (By.XPATH, "//span[contains(text(), '视频') or contains(text(), 'Videos')]")))
                 video_tab.click()
                 print("已切换到视频标签")
-                time.sleep(3)
             except:
                 print("未找到视频标签或已经在视频标签页")
+            # 等待视频卡片渲染，最多10秒
+            if not self.selectors.wait_for(driver, 'video_card', VIDEO_CARD_SELECTORS, timeout=10):
+                print("10秒内未等到视频卡片，继续尝试解析")
             
             # 开始滚动和采集
+            self.date_range.restart()
             scroll_count = 0
             max_scroll = 30  # 最大滚动次数，防止无限循环
+            parsed = 0  # 已处理到的卡片下标，每轮只解析新加载的卡片
             
             while len(all_videos) < max_videos and self.is_running and scroll_count < max_scroll:
                 # 检查是否暂停
@@ -312,22 +391,11 @@ class DouyinScraper:
                     # 获取当前页面上的所有视频元素
                     print("\n尝试获取视频元素...")
                     
-                    # 尝试多种可能的选择器
-                    selectors = [
-                        '.douyin-search-card', 
-                        '.search-result-card',
-                        '.video-card',
-                        '[data-e2e="searchcard-item"]',
-                        '.search_card_video'
-                    ]
-                    
-                    video_elements = []
-                    for selector in selectors:
-                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            video_elements = elements
-                            print(f"使用选择器 '{selector}' 找到 {len(elements)} 个视频元素")
-                            break
+                    # 尝试多种可能的选择器，上次命中的优先
+                    video_elements = self.selectors.find_all(driver, 'video_card', VIDEO_CARD_SELECTORS)
+                    if video_elements:
+                        print(f"使用选择器 '{self.selectors.ordered('video_card', VIDEO_CARD_SELECTORS)[0]}' "
+                              f"找到 {len(video_elements)} 个视频元素")
                     
                     if not video_elements:
                         print("未找到视频元素，尝试使用XPath...")
@@ -340,8 +408,12 @@ class DouyinScraper:
                         page_source = driver.page_source
                         print(page_source[:1000] + "...")  # 只打印前1000个字符
                     
+                    if len(video_elements) < parsed:
+                        # 卡片数变少说明列表被重新渲染，从头处理
+                        parsed = 0
+                    
                     # 处理找到的视频元素
-                    for i, element in enumerate(video_elements):
+                    for i, element in enumerate(video_elements[parsed:], start=parsed):
                         if len(all_videos) >= max_videos:
                             break
                         
@@ -349,6 +421,7 @@ class DouyinScraper:
                             print("爬虫已暂停，按'p'继续...")
                             break
                         
+                        parsed = i + 1
                         try:
                             # 滚动到元素位置确保加载
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
@@ -361,32 +434,28 @@ class DouyinScraper:
                             if video_data:
                                 print(f"成功解析视频: {video_data['标题'][:30]}...")
                                 all_videos.append(video_data)
-                                save_counter += 1
                                 
-                                # 每解析3个视频保存一次
-                                if save_counter >= 3:
-                                    if all_videos:
-                                        df = pd.DataFrame(all_videos)
-                                        self._save_to_excel(df, keyword)
-                                        print(f"已保存 {len(all_videos)} 个视频数据")
-                                    save_counter = 0
+                                # 追加到分段存储，每满3个视频落盘一次
+                                segments.write(video_data)
                         except Exception as e:
                             print(f"处理单个视频时出错: {str(e)}")
                             continue
                     
+                    # 按最新发布排序时判断信息流是否已越过开始日期；综合排序下只过滤不提前停止
+                    counts = self.date_range.reset_counts()
+                    if self.sort_by_time and self.date_range.passed_start(counts):
+                        print(f"按最新发布排序已越过 {self.date_range.describe()} 的开始日期，停止采集")
+                        break
+                    
                     # 滚动页面加载更多
                     print("\n滚动页面加载更多视频...")
-                    last_height = driver.execute_script("return document.body.scrollHeight")
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(3)  # 等待加载
-                    
-                    # 检查是否已滚动到底部
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
+                    pages += 1
+                    # 新卡片出现后立即继续，超时仍没有新卡片说明可能已到底部
+                    if self.scroll_page(driver):
+                        scroll_count = 0  # 重置计数器
+                    else:
                         scroll_count += 1
                         print(f"可能已到达页面底部，继续尝试 ({scroll_count}/{max_scroll})")
-                    else:
-                        scroll_count = 0  # 重置计数器
                     
                 except Exception as e:
                     print(f"页面处理出错: {str(e)}")
@@ -397,37 +466,39 @@ class DouyinScraper:
             
         except Exception as e:
             print(f"\n程序出错: {str(e)}")
+            healthy = False
         
         finally:
+            self._release_driver(driver, pages, healthy)
+            if external_segments:
+                segments.flush()
+                print(f"\n共采集 {len(all_videos)} 个视频")
+                return pd.DataFrame(all_videos)
             if all_videos:
                 df = pd.DataFrame(all_videos)
-                self._save_to_excel(df, keyword)
+                segments.flush()
+                self._save_to_excel(segments, keyword)
                 print(f"\n共采集 {len(all_videos)} 个视频")
-                driver.quit()
                 return df
             else:
                 print("\n警告：没有采集到任何数据")
-                driver.quit()
+                segments.discard()
                 return pd.DataFrame()
 
-    def _save_to_excel(self, videos, keyword):
-        if not videos.empty:
+    def _save_to_excel(self, segments, keyword):
+        """把分段存储合并为一个Excel文件，合并成功后删除分段"""
+        if segments.segments:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = os.path.join(self.data_path, f"douyin_{keyword}_{timestamp}.xlsx")
             try:
-                df = videos
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = os.path.join(self.data_path, f"douyin_{keyword}_{timestamp}.xlsx")
-                
-                df.to_excel(filename, index=False, engine='openpyxl')
+                count = segments.compact(filename)
                 print(f"\n数据已保存到: {filename}")
-                print(f"保存的数据条数: {len(df)}")
-                
-                print("\n数据概要:")
-                print(f"总条数: {len(df)}")
-                print(f"包含的字段: {', '.join(df.columns)}")
+                print(f"保存的数据条数: {count}")
                 
                 if os.path.exists(filename):
                     file_size = os.path.getsize(filename)
                     print(f"文件大小: {file_size/1024:.2f} KB")
+                    segments.discard()
                 else:
                     print("警告：文件似乎未成功创建")
                 
@@ -435,10 +506,11 @@ class DouyinScraper:
                 print(f"保存到Excel时出错: {e}")
                 try:
                     csv_filename = filename.replace('.xlsx', '.csv')
-                    df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
+                    segments.compact(csv_filename)
                     print(f"已保存为CSV格式: {csv_filename}")
+                    segments.discard()
                 except Exception as csv_e:
-                    print(f"保存CSV也失败: {csv_e}")
+                    print(f"保存CSV也失败: {csv_e}，分段数据保留在: {segments.directory}")
         else:
             print("没有数据需要保存")
 
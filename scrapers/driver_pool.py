@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from multiprocessing import util
+
+logger = logging.getLogger("DriverPool")
+
+
+class _PooledDriver:
+    def __init__(self, key, driver):
+        self.key = key
+        self.driver = driver
+        self.pages = 0
+        self.uses = 0
+        self.created = time.time()
+
+
+class DriverPool:
+    """
+    预热的 Chrome driver 池，小红书和抖音爬虫共用
+    - 按 key 区分不同配置的浏览器（平台、无头、轻量等），同一 key 的 driver 可以直接复用
+    - checkout 时做健康检查，失效的 driver 直接丢弃重建
+    - checkin 时累计页数，超过 max_pages 或 JS 堆超过 max_memory_mb 时回收，
+      否则回到空白页等待下一个任务
+    - 活动 driver 总数不超过 size，达到上限时先关闭其他 key 的空闲 driver，再等待归还
+    参数:
+        size: 同时存在的 driver 数量上限
+        max_pages: 一个 driver 处理的页数上限
+        max_memory_mb: 归还时页面 JS 堆的上限（MB）
+    """
+    def __init__(self, size=2, max_pages=300, max_memory_mb=1024):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self._idle = []
+        self._busy = {}
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _healthy(self, pooled):
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def _take_idle(self, key):
+        """取出一个同 key 的健康空闲 driver，失效的顺便丢弃"""
+        while True:
+            pooled = next((p for p in self._idle if p.key == key), None)
+            if pooled is None:
+                return None
+            self._idle.remove(pooled)
+            if self._healthy(pooled):
+                return pooled
+            logger.info(f"driver 已失效，丢弃: {key}")
+            self._quit(pooled)
+
+    def checkout(self, key, factory, timeout=None):
+        """
+        取出一个 key 对应的 driver，没有空闲的就用 factory() 新建
+        返回 (driver, 是否为复用的 driver)
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("driver 池已关闭")
+                pooled = self._take_idle(key)
+                if pooled is not None:
+                    pooled.uses += 1
+                    self.reused += 1
+                    self._busy[id(pooled.driver)] = pooled
+                    return pooled.driver, True
+                if len(self._busy) + len(self._idle) < self.size:
+                    break
+                if self._idle:
+                    # 为新 key 腾出位置
+                    self._quit(self._idle.pop(0))
+                    continue
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("等待空闲 driver 超时")
+                self._condition.wait(remaining)
+            # 占位，创建期间其他线程不会超出上限
+            placeholder = _PooledDriver(key, None)
+            self._busy[id(placeholder)] = placeholder
+
+        try:
+            driver = factory()
+        except Exception:
+            with self._condition:
+                del self._busy[id(placeholder)]
+                self._condition.notify()
+            raise
+        with self._condition:
+            del self._busy[id(placeholder)]
+            placeholder.driver = driver
+            placeholder.uses = 1
+            self._busy[id(driver)] = placeholder
+            self.created += 1
+        logger.info(f"新建 driver: {key}")
+        return driver, False
+
+    def _memory_mb(self, driver):
+        try:
+            used = driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0")
+            return (used or 0) / 1024 / 1024
+        except Exception:
+            return 0
+
+    def checkin(self, driver, pages=0, healthy=True):
+        """归还 driver；pages 为本次任务处理的页数，healthy 为 False 时直接回收"""
+        with self._condition:
+            pooled = self._busy.pop(id(driver), None)
+        if pooled is None:
+            return
+        pooled.pages += pages
+        memory = self._memory_mb(driver) if healthy else 0
+        recycle = (not healthy or self._closed or pooled.pages >= self.max_pages
+                   or memory >= self.max_memory_mb)
+        if not recycle:
+            try:
+                # 释放上一个任务的页面
+                driver.get("about:blank")
+            except Exception:
+                recycle = True
+        if recycle:
+            logger.info(f"回收 driver: {pooled.key}，已处理 {pooled.pages} 页，JS 堆 {memory:.0f} MB")
+            self._quit(pooled)
+        with self._condition:
+            if recycle:
+                self.recycled += 1
+            else:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def warm(self, key, factory, count=1):
+        """预先创建 driver 放入空闲列表"""
+        drivers = [self.checkout(key, factory)[0] for _ in range(count)]
+        for driver in drivers:
+            self.checkin(driver)
+
+    def close(self):
+        """关闭所有空闲 driver，正在使用的 driver 归还时关闭"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+    def stats(self):
+        with self._condition:
+            return {'空闲': len(self._idle), '使用中': len(self._busy), '新建': self.created,
+                    '复用': self.reused, '回收': self.recycled}
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_driver_pool():
+    """
+    进程内共享的默认 driver 池，进程退出时关闭其中的浏览器
+    进程池的工作进程退出时不执行 atexit，这里用 multiprocessing 的退出钩子，
+    主进程和工作进程退出时都会执行
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool()
+            util.Finalize(_default_pool, _default_pool.close, exitpriority=10)
+        return _default_pool
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import random
+import threading
+
+try:
+    from scrapers.checkpoint import atomic_write_json
+except ImportError:  # 直接以脚本方式运行时
+    from checkpoint import atomic_write_json
+
+logger = logging.getLogger("IdentityPool")
+
+# 不同浏览器默认发送的 Accept-Language 不同，按UA所属浏览器搭配
+_ACCEPT_LANGUAGES = {
+    'safari': 'zh-CN,zh-Hans;q=0.9',
+    'firefox': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
+    'chrome': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+_REFERERS = (
+    'https://m.weibo.cn/',
+    'https://m.weibo.cn/search?containerid=100103type%3D1%26q%3D',
+    'https://m.weibo.cn/p/searchall',
+)
+# 无法使用 fake_useragent 时的备用UA
+_FALLBACK_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
+    'Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Mobile Safari/537.36',
+)
+
+
+def _browser_family(user_agent):
+    if 'Firefox/' in user_agent:
+        return 'firefox'
+    if 'Chrome/' in user_agent or 'CriOS/' in user_agent or 'Edg/' in user_agent:
+        return 'chrome'
+    return 'safari'
+
+
+def _make_identity(user_agent):
+    return {
+        'User-Agent': user_agent,
+        'Accept-Language': _ACCEPT_LANGUAGES[_browser_family(user_agent)],
+        'Referer': random.choice(_REFERERS),
+    }
+
+
+class IdentityPool:
+    """
+    预生成的请求身份池：每个身份包含一组相互匹配的 User-Agent、Accept-Language 和 Referer
+    - 第一次取用时才加载；缓存文件存在时直接读取，否则用 fake_useragent 生成一次并写入缓存
+    - 取用只是一次随机下标访问，不再在每次请求时解析 fake_useragent 的数据集
+    参数:
+        path: 缓存文件路径
+        size: 生成的身份数量
+    """
+    def __init__(self, path="data/identity_pool.json", size=200):
+        self.path = path
+        self.size = size
+        self._identities = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    identities = json.load(f)
+                if identities:
+                    return identities
+            except (OSError, ValueError):
+                logger.warning(f"身份池缓存损坏，重新生成: {self.path}")
+
+        identities = [_make_identity(ua) for ua in self._generate_user_agents()]
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        atomic_write_json(self.path, identities)
+        logger.info(f"已生成 {len(identities)} 个请求身份并缓存到: {self.path}")
+        return identities
+
+    def _generate_user_agents(self):
+        try:
+            from fake_useragent import UserAgent
+            ua = UserAgent()
+            # 重复的UA去重，尝试次数有上限
+            user_agents = list({ua.random for _ in range(self.size * 3)})
+            random.shuffle(user_agents)
+            return user_agents[:self.size]
+        except Exception as e:
+            logger.warning(f"fake_useragent 不可用（{e}），使用内置UA列表")
+            return list(_FALLBACK_USER_AGENTS)
+
+    @property
+    def identities(self):
+        if self._identities is None:
+            with self._lock:
+                if self._identities is None:
+                    self._identities = self._load()
+        return self._identities
+
+    def random(self):
+        """随机取一个身份（请求头字典），调用方不应修改返回值"""
+        identities = self.identities
+        return identities[random.randrange(len(identities))]
+
+    def __len__(self):
+        return len(self.identities)
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_identity_pool():
+    """进程内共享的默认身份池，创建时不加载，第一次取用时才读取缓存"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = IdentityPool()
+        return _default_pool
@@ -0,0 +1,151 @@
+import copy
+import glob
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "weibo")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # 保持长连接，客户端的连接池复用才能体现在测试结果中
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，关闭 Nagle 避免与客户端的延迟确认叠加出约40ms的额外延迟
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        status, body = self.server.mock.respond(url.path, parse_qs(url.query))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockWeiboServer:
+    """
+    本地模拟的微博接口，回放 fixtures 中录制的 getIndex 响应，用于离线测量爬虫吞吐量
+    - 第 N 页使用第 (N-1) % 文件数 个 getIndex_page*.json，微博ID按页改写保证不重复
+    - /statuses/extend 返回 extend.json 中的长微博全文
+    - 可配置响应延迟、服务端错误（500）和限流（418）比例，以及分页结束方式
+    参数:
+        total_pages: 有数据的页数
+        latency / jitter: 每个响应的固定延迟与随机抖动（秒）
+        error_rate / throttle_rate: 返回 500 / 418 的概率
+        end_behavior: 'last_page' 表示最后一页的 cardlistInfo.page 不再递增，
+                      'empty' 表示超出 total_pages 后只返回空卡片
+        seed: 随机数种子，相同参数下错误分布可复现
+    """
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, total_pages=50, latency=0.05, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, end_behavior='last_page', host='127.0.0.1',
+                 port=0, seed=0):
+        if end_behavior not in ('last_page', 'empty'):
+            raise ValueError(f"不支持的分页结束方式: {end_behavior}")
+        self.total_pages = total_pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.end_behavior = end_behavior
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._server = None
+        self._thread = None
+
+        self._fixtures = []
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "getIndex_page*.json"))):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._fixtures.append(json.load(f))
+        if not self._fixtures:
+            raise ValueError(f"未找到 getIndex 录制数据: {fixtures_dir}")
+        with open(os.path.join(fixtures_dir, "extend.json"), 'r', encoding='utf-8') as f:
+            self._extend = json.dumps(json.load(f), ensure_ascii=False).encode('utf-8')
+        self._empty = json.dumps({'ok': 0, 'msg': '这里还没有内容', 'data': {'cards': []}},
+                                 ensure_ascii=False).encode('utf-8')
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _page_body(self, page):
+        """按页生成并缓存响应体，避免服务端的序列化开销影响测量"""
+        body = self._pages.get(page)
+        if body is None:
+            data = copy.deepcopy(self._fixtures[(page - 1) % len(self._fixtures)])
+            for card in data['data']['cards']:
+                mblog = card.get('mblog')
+                if mblog:
+                    mblog['id'] = mblog['mid'] = f"{mblog['id']}{page:06d}"
+            last = self.end_behavior == 'last_page' and page == self.total_pages
+            data['data']['cardlistInfo']['page'] = page if last else page + 1
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self._pages[page] = body
+        return body
+
+    def respond(self, path, params):
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+        if roll < self.error_rate + self.throttle_rate:
+            with self._lock:
+                self.errors += 1
+            return (500 if roll < self.error_rate else 418), b'{"ok": 0}'
+        if path == '/api/container/getIndex':
+            page = int(params.get('page', ['1'])[0])
+            if page > self.total_pages:
+                return 200, self._empty
+            return 200, self._page_body(page)
+        if path == '/statuses/extend':
+            return 200, self._extend
+        return 404, b'{"ok": 0}'
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MockWeiboServer",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def stats(self):
+        return {'requests': self.requests, 'errors': self.errors}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = MockWeiboServer(port=8765).start()
+    print(f"模拟微博接口已启动: {server.url}/api/container/getIndex ，按 Ctrl+C 退出")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("RateLimiter")
+
+
+class TokenBucket:
+    """
+    令牌桶限速器，同一个实例可在多个线程和协程之间共享
+    参数:
+        rate: 每秒补充的令牌数（即允许的平均请求速率）
+        capacity: 桶容量，即允许的最大突发请求数
+    """
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = float(max(1, capacity))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens=1):
+        """预留令牌，返回需要等待的秒数（令牌不足时记为欠账，保证先到先得）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def set_rate(self, rate):
+        """调整补充速率，已累积的令牌保持不变"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.rate = float(rate)
+
+    def acquire(self, tokens=1):
+        """阻塞直到获得令牌"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        """协程版本的 acquire，等待期间不阻塞事件循环"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class AIMDController:
+    """
+    加性增、乘性减（AIMD）自适应速率控制器
+    - 每收到一个正常响应，速率增加 increase（页/秒）
+    - 遇到限流信号（418/429/403、空卡片页、跳转登录等）时速率乘以 decrease
+    - 同一个冷却期内多个在途请求同时失败只降速一次
+    参数:
+        initial_rate / min_rate / max_rate: 初始、最低、最高速率（页/秒）
+        window: 统计错误率的滑动窗口大小
+        bucket: 可选的 TokenBucket，速率变化时同步更新
+    """
+    def __init__(self, initial_rate, min_rate=0.05, max_rate=2.0, increase=0.01,
+                 decrease=0.5, window=50, bucket=None):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.bucket = bucket
+        self._rate = min(max_rate, max(min_rate, initial_rate))
+        self._outcomes = deque(maxlen=window)
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._sync_bucket()
+
+    @property
+    def rate(self):
+        """当前速率（页/秒）"""
+        return self._rate
+
+    @property
+    def error_ratio(self):
+        """滑动窗口内的失败比例"""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def _sync_bucket(self):
+        if self.bucket is not None:
+            self.bucket.set_rate(self._rate)
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            self._rate = min(self.max_rate, self._rate + self.increase)
+            self._sync_bucket()
+
+    def record_failure(self, reason=""):
+        with self._lock:
+            self._outcomes.append(False)
+            now = time.monotonic()
+            # 冷却期为当前速率下一个请求的间隔，避免同一批在途请求重复降速
+            if now - self._last_decrease < 1.0 / self._rate:
+                return
+            self._last_decrease = now
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            self._sync_bucket()
+        logger.warning(f"检测到限流信号（{reason}），速率降至 {self._rate * 60:.1f} 页/分钟")
+
+    def next_delay(self):
+        """串行模式下两次请求之间的等待时间，带少量随机抖动"""
+        return random.uniform(0.8, 1.2) / self._rate
+
+    def stats(self):
+        return {'rate_per_minute': round(self._rate * 60, 2), 'error_ratio': round(self.error_ratio, 3)}
+
+    def state(self):
+        """导出可序列化的控制器状态，用于断点保存"""
+        with self._lock:
+            return {'rate': self._rate, 'outcomes': list(self._outcomes)}
+
+    def load_state(self, state):
+        """从断点恢复控制器状态"""
+        if not state:
+            return
+        with self._lock:
+            self._rate = min(self.max_rate, max(self.min_rate, state.get('rate', self._rate)))
+            self._outcomes.clear()
+            self._outcomes.extend(state.get('outcomes', []))
+            self._sync_bucket()
@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("ResponseCache")
+
+
+class ResponseCache:
+    """
+    基于内容寻址的磁盘响应缓存
+    - 键为 URL + 排序后的参数的 SHA-256，文件按键的前两位分目录存放
+    - 每个条目以 gzip 压缩的 JSON 存储，并记录自己的过期时间（TTL）
+    - 总大小超过 max_bytes 时按最近使用时间（文件 mtime，命中时刷新）淘汰
+    参数:
+        cache_dir: 缓存目录
+        ttl: 默认有效期（秒）
+        max_bytes: 缓存总大小上限（字节）
+    """
+    def __init__(self, cache_dir="data/weibo/cache", ttl=3600, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def make_key(url, params=None):
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([url, items], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.gz")
+
+    def _entries(self):
+        """遍历所有缓存文件，返回 (路径, 大小, mtime)"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json.gz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total_bytes -= size
+        except FileNotFoundError:
+            pass
+
+    def get(self, url, params=None):
+        """读取未过期的缓存内容，未命中返回 None"""
+        path = self._path(self.make_key(url, params))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError):
+            logger.warning(f"缓存文件损坏，已删除: {path}")
+            with self._lock:
+                self._remove(path)
+            self.misses += 1
+            return None
+
+        if entry.get('expires_at', 0) < time.time():
+            with self._lock:
+                self._remove(path)
+            self.misses += 1
+            return None
+
+        # 刷新 mtime，作为LRU淘汰的依据
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return entry['body']
+
+    def put(self, url, params, body, ttl=None):
+        """写入缓存，ttl 为 None 时使用默认有效期"""
+        path = self._path(self.make_key(url, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'url': url,
+            'params': params,
+            'stored_at': time.time(),
+            'expires_at': time.time() + (self.ttl if ttl is None else ttl),
+            'body': body,
+        }
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        with self._lock:
+            if os.path.exists(path):
+                self._remove(path)
+            os.replace(tmp_path, path)
+            self._total_bytes += os.path.getsize(path)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """按最近使用时间从旧到新淘汰，直到总大小降到上限的90%以下"""
+        target = self.max_bytes * 0.9
+        for path, _, _ in sorted(self._entries(), key=lambda e: e[2]):
+            if self._total_bytes <= target:
+                break
+            self._remove(path)
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in list(self._entries()):
+                self._remove(path)
+            self._total_bytes = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size_mb': round(self._total_bytes / 1024 / 1024, 2)}
@@ -0,0 +1,42 @@
+# 滚动到底部后在页面内等待新卡片插入：MutationObserver 看到第一个新卡片后
+# 再等 settle 毫秒收齐同一批，超时仍没有新卡片则返回 0
+SCROLL_AND_WAIT_JS = """
+const [selector, timeoutMs, settleMs, done] = arguments;
+let added = 0;
+let finished = false;
+let settleTimer = null;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timeoutTimer);
+    clearTimeout(settleTimer);
+    done(added);
+};
+const observer = new MutationObserver(mutations => {
+    for (const mutation of mutations) {
+        for (const node of mutation.addedNodes) {
+            if (node.nodeType !== 1) continue;
+            added += node.matches(selector) ? 1 : node.querySelectorAll(selector).length;
+        }
+    }
+    if (added && settleTimer === null) settleTimer = setTimeout(finish, settleMs);
+});
+observer.observe(document.body, {childList: true, subtree: true});
+const timeoutTimer = setTimeout(finish, timeoutMs);
+window.scrollTo(0, document.body.scrollHeight);
+"""
+
+
+def scroll_for_more(driver, card_selector, timeout=8, settle=0.3):
+    """
+    滚动一次并等待新卡片加载，新卡片一出现就返回，不再固定等待
+    参数:
+        card_selector: 卡片的CSS选择器，可以是逗号分隔的多个选择器
+        timeout: 最多等待的秒数
+        settle: 看到第一个新卡片后继续收集同一批卡片的秒数
+    返回: 新插入的卡片数，超时返回 0
+    """
+    driver.set_script_timeout(timeout + 5)
+    return driver.execute_async_script(SCROLL_AND_WAIT_JS, card_selector, int(timeout * 1000),
+                                       int(settle * 1000))
@@ -0,0 +1,70 @@
+from collections import Counter
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+class SelectorEngine:
+    """
+    小红书、抖音爬虫共用的选择器解析
+    - 配合 implicitly_wait(0) 使用：find_elements 未命中时立即返回，不再每次等待10秒
+    - 每组候选选择器记住上次命中的选择器，下次优先尝试（移到最前）
+    - 只有页面确实需要加载的地方才用 wait_for 做有上限的显式等待
+    """
+    def __init__(self):
+        self._orders = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def ordered(self, name, selectors):
+        """返回名为 name 的候选组当前的尝试顺序"""
+        order = self._orders.get(name)
+        if order is None:
+            order = self._orders[name] = list(selectors)
+        return list(order)
+
+    def promote(self, name, selector):
+        order = self._orders[name]
+        if order[0] != selector:
+            order.remove(selector)
+            order.insert(0, selector)
+
+    def find_all(self, root, name, selectors, by=By.CSS_SELECTOR):
+        """按学习到的顺序尝试，返回第一个有结果的选择器找到的全部元素"""
+        for selector in self.ordered(name, selectors):
+            elements = root.find_elements(by, selector)
+            if elements:
+                self.hits[name] += 1
+                self.promote(name, selector)
+                return elements
+        self.misses[name] += 1
+        return []
+
+    def text(self, root, name, selectors, default=None, by=By.CSS_SELECTOR, non_empty=False):
+        """
+        返回第一个命中元素的文本；non_empty 为 True 时跳过文本为空的元素，
+        继续尝试后面的选择器
+        """
+        for selector in self.ordered(name, selectors):
+            for element in root.find_elements(by, selector)[:1]:
+                text = element.text.strip() if non_empty else element.text
+                if non_empty and not text:
+                    continue
+                self.hits[name] += 1
+                self.promote(name, selector)
+                return text
+        self.misses[name] += 1
+        return default
+
+    def wait_for(self, root, name, selectors, timeout=10, by=By.CSS_SELECTOR):
+        """显式等待任一候选选择器出现，最多等待 timeout 秒，超时返回空列表"""
+        try:
+            return WebDriverWait(root, timeout, poll_frequency=0.2).until(
+                lambda _: self.find_all(root, name, selectors, by))
+        except Exception:
+            return []
+
+    def stats(self):
+        return {name: {'命中': self.hits[name], '未命中': self.misses[name],
+                       '顺序': list(order)}
+                for name, order in self._orders.items()}
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from selenium.webdriver.common.by import By
+
+try:
+    from scrapers.checkpoint import atomic_write_json
+except ImportError:  # 直接以脚本方式运行时
+    from checkpoint import atomic_write_json
+
+# 各站点的来源和表示已登录的 cookie；页面出现 login_selector 说明需要重新登录
+SITES = {
+    'xiaohongshu': {
+        'origin': 'https://www.xiaohongshu.com',
+        'login_cookies': ['web_session'],
+        'login_selector': '.login-container',
+    },
+    'douyin': {
+        'origin': 'https://www.douyin.com',
+        'login_cookies': ['sessionid', 'sessionid_ss'],
+        'login_selector': '#login-panel-new, [data-e2e="login-panel"]',
+    },
+}
+
+# 在每个新文档执行前写入 localStorage，不需要先打开一次页面；已有的值不覆盖
+_RESTORE_STORAGE_JS = """
+if (location.origin === %s) {
+    const items = %s;
+    for (const [key, value] of Object.entries(items)) {
+        if (localStorage.getItem(key) === null) localStorage.setItem(key, value);
+    }
+}
+"""
+
+
+class SessionStore:
+    """
+    保存和恢复浏览器登录会话（cookies 和 localStorage）
+    - 手动登录一次后 save，之后新建的 driver 在打开页面前 restore，跳过登录等待
+    - 会话超过 max_age 或表示登录的 cookie 已过期时视为无效，不再注入
+    参数:
+        site: SITES 中的站点名
+        path: 会话文件路径，默认 data/sessions/<site>.json
+        max_age: 会话的最长使用时间
+    """
+    def __init__(self, site, path=None, max_age=timedelta(days=7)):
+        if site not in SITES:
+            raise ValueError(f"不支持的站点: {site}")
+        self.site = site
+        self.config = SITES[site]
+        self.path = path or os.path.join("data", "sessions", f"{site}.json")
+        self.max_age = max_age
+
+    def save(self, driver):
+        """保存当前 driver 的 cookies 和当前页面的 localStorage"""
+        session = {
+            'site': self.site,
+            'saved_at': datetime.now().isoformat(),
+            'cookies': driver.get_cookies(),
+            'local_storage': driver.execute_script(
+                "return location.origin === arguments[0] ? Object.assign({}, localStorage) : {};",
+                self.config['origin']),
+        }
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        atomic_write_json(self.path, session)
+        print(f"登录会话已保存到: {self.path}")
+
+    def load(self):
+        """读取会话，文件不存在、损坏或已失效时返回 None"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            print(f"会话文件损坏，忽略: {self.path}")
+            return None
+        return session if self.is_valid(session) else None
+
+    def is_valid(self, session):
+        saved_at = datetime.fromisoformat(session.get('saved_at', '1970-01-01'))
+        if datetime.now() - saved_at > self.max_age:
+            print(f"登录会话已超过 {self.max_age.days} 天，需要重新登录")
+            return False
+        now = time.time()
+        login_cookies = [c for c in session.get('cookies', [])
+                         if c['name'] in self.config['login_cookies']]
+        if not login_cookies or any(c.get('expiry', now + 1) <= now for c in login_cookies):
+            print("登录 cookie 缺失或已过期，需要重新登录")
+            return False
+        return True
+
+    def restore(self, driver):
+        """
+        把保存的会话注入尚未打开页面的 driver，成功返回 True
+        cookies 通过 CDP 直接写入，localStorage 在页面脚本执行前写入
+        """
+        session = self.load()
+        if session is None:
+            return False
+        cookies = []
+        for cookie in session['cookies']:
+            cdp_cookie = {key: cookie[key] for key in
+                          ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                          if key in cookie}
+            if 'expiry' in cookie:
+                cdp_cookie['expires'] = cookie['expiry']
+            cookies.append(cdp_cookie)
+        try:
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+            if session.get('local_storage'):
+                driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                    'source': _RESTORE_STORAGE_JS % (json.dumps(self.config['origin']),
+                                                     json.dumps(session['local_storage'],
+                                                                ensure_ascii=False))
+                })
+        except Exception as e:
+            print(f"注入登录会话失败: {e}")
+            return False
+        print(f"已注入保存的登录会话（{len(cookies)} 个 cookie）")
+        return True
+
+    def is_logged_in(self, driver):
+        """在已打开站点页面的 driver 上检查登录状态：登录 cookie 仍在且没有出现登录框"""
+        names = {cookie['name'] for cookie in driver.get_cookies()}
+        if not names.intersection(self.config['login_cookies']):
+            return False
+        return not driver.find_elements(By.CSS_SELECTOR, self.config['login_selector'])
@@ -0,0 +1,234 @@
+import csv
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+logger = logging.getLogger("Sinks")
+
+# 分段目录的 manifest 文件，每行一个分段
+MANIFEST_NAME = "manifest.jsonl"
+
+
+class BatchSink:
+    """
+    记录输出端的基类：write() 先写入缓冲区，每满 batch_size 条批量落盘一次，
+    内存中最多只保留一个批次的记录
+    子类实现 _write_batch(records) 和 _close()
+    """
+    def __init__(self, batch_size=200):
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer = []
+
+    def write(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvSink(BatchSink):
+    """流式写入CSV（utf-8-sig，Excel可直接打开），列由第一条记录决定"""
+    def __init__(self, path, batch_size=200):
+        super().__init__(batch_size)
+        self.path = path
+        self._file = None
+        self._writer = None
+
+    def _write_batch(self, records):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.DictWriter(self._file, fieldnames=list(records[0].keys()),
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows(records)
+        self._file.flush()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            logger.info(f"CSV格式数据已保存到: {self.path}（{self.count} 条）")
+
+
+def _excel_value(value):
+    """openpyxl 不支持带时区的时间，写入时去掉时区，保留当地时间"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+class ExcelSink(BatchSink):
+    """使用 openpyxl 的 write_only 模式流式写入Excel，行数据不在内存中累积"""
+    def __init__(self, path, batch_size=200):
+        super().__init__(batch_size)
+        self.path = path
+        self._workbook = None
+        self._sheet = None
+        self._columns = None
+
+    def _write_batch(self, records):
+        if self._workbook is None:
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._columns = list(records[0].keys())
+            self._sheet.append(self._columns)
+        for record in records:
+            self._sheet.append([_excel_value(record.get(column)) for column in self._columns])
+
+    def _close(self):
+        if self._workbook is not None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._workbook.save(self.path)
+            logger.info(f"全部数据已保存到: {self.path}（{self.count} 条）")
+
+
+class CallbackSink(BatchSink):
+    """把每个批次交给回调函数处理，便于接入数据库等其他输出"""
+    def __init__(self, callback, batch_size=200):
+        super().__init__(batch_size)
+        self.callback = callback
+
+    def _write_batch(self, records):
+        self.callback(list(records))
+
+
+class TransformSink(BatchSink):
+    """
+    按批次对记录做向量化处理后再转发给下游输出端：每个批次构造一次 DataFrame，
+    依次调用 transforms 中的函数（接收并返回 DataFrame），处理结果写入所有下游输出端
+    """
+    def __init__(self, sinks, transforms, batch_size=200):
+        super().__init__(batch_size)
+        self.sinks = list(sinks)
+        self.transforms = list(transforms)
+
+    def _write_batch(self, records):
+        df = pd.DataFrame(records)
+        for transform in self.transforms:
+            df = transform(df)
+        # NaT/NaN 写出为空值
+        df = df.astype(object).where(df.notna(), None)
+        for record in df.to_dict('records'):
+            for sink in self.sinks:
+                sink.write(record)
+
+    def flush(self):
+        super().flush()
+        for sink in self.sinks:
+            sink.flush()
+
+    def _close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class SegmentSink(BatchSink):
+    """
+    只追加的分段存储：每个批次写成一个新的 JSONL 分段文件，manifest.jsonl 每行记录一个分段，
+    每次保存只写入新记录和一行 manifest，不再重写全部数据。结束时调用 compact() 合并为单个文件
+    目录中已有 manifest 时在其后继续追加
+    """
+    def __init__(self, directory, batch_size=200):
+        super().__init__(batch_size)
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        os.makedirs(directory, exist_ok=True)
+        self.segments = read_manifest(directory)
+
+    def _write_batch(self, records):
+        name = f"part-{len(self.segments):05d}.jsonl"
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        # 分段文件落盘后再追加 manifest，manifest 中只会出现完整的分段
+        segment = {
+            'file': name,
+            'rows': len(records),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(segment, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.segments.append(segment)
+
+    def iter_records(self):
+        self.flush()
+        return iter_segment_records(self.directory)
+
+    def compact(self, path):
+        """把所有分段流式合并为单个 .xlsx 或 .csv 文件，返回写入的记录数"""
+        self.flush()
+        return compact_segments(self.directory, path)
+
+    def discard(self):
+        """合并完成后删除分段目录"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.segments = []
+
+
+def read_manifest(directory):
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return []
+    segments = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                segments.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 进程中途退出时最后一行可能不完整
+                logger.warning(f"跳过不完整的 manifest 行: {manifest_path}")
+    return segments
+
+
+def iter_segment_records(directory):
+    """按 manifest 顺序逐条读取分段中的记录"""
+    for segment in read_manifest(directory):
+        with open(os.path.join(directory, segment['file']), 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def compact_segments(directory, path):
+    """
+    把分段目录合并为单个文件（按扩展名选择 .xlsx 或 .csv），
+    也可用于合并中途退出的爬取留下的分段
+    """
+    sink = ExcelSink(path) if path.endswith('.xlsx') else CsvSink(path)
+    with sink:
+        for record in iter_segment_records(directory):
+            sink.write(record)
+    return sink.count
@@ -0,0 +1,142 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("HttpTransport")
+
+# 这些状态码通常是临时性的，值得重试
+RETRY_STATUS_CODES = (418, 429, 500, 502, 503, 504)
+
+
+class RetryBudget:
+    """
+    全局重试预算：重试次数不超过 min_retries + ratio * 已发请求数，
+    防止接口异常时大量重试挤占整个爬取时间窗口
+    """
+    def __init__(self, ratio=0.2, min_retries=10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self):
+        """申请一次重试，预算耗尽时返回 False"""
+        with self._lock:
+            if self.retries >= self.min_retries + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+class HttpTransport:
+    """
+    共享的HTTP传输层
+    - 使用持久化 Session 复用 TCP/TLS 连接（keep-alive）
+    - 每个主机的连接数不超过 max_connections_per_host，超出时排队等待
+    - 迭代式重试，指数退避并遵守 Retry-After，所有重试受全局重试预算约束
+    """
+    def __init__(self, max_connections_per_host=8, max_retries=5, backoff_base=2.0,
+                 backoff_max=60.0, retry_budget=None, timeout=15):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget or RetryBudget()
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,  # 连接用尽时等待，而不是新建连接
+            max_retries=0,    # 重试由本类统一处理
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _retry_after(self, response):
+        """解析 Retry-After 头（秒数或HTTP日期），无法解析时返回 None"""
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt, response=None):
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max * 5)
+        delay = self.backoff_base * (2 ** attempt)
+        return min(self.backoff_max, delay) * random.uniform(0.5, 1.0)
+
+    def get(self, url, params=None, headers=None, timeout=None, on_attempt=None):
+        """
+        发送GET请求
+        返回最后一次收到的响应（可能是非200状态）；如果始终没有收到响应，抛出最后一次的异常
+        on_attempt: 可选回调 on_attempt(response, error)，每次尝试（包括重试）后调用，
+                    供速率控制器观察限流信号
+        """
+        # 只按逻辑请求计数，重试不会抬高自己的预算
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            response, error = None, None
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=timeout or self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                logger.warning(f"请求返回状态码 {response.status_code}: {url}")
+            except requests.RequestException as e:
+                error = e
+                logger.warning(f"请求出错: {e}")
+            finally:
+                if on_attempt is not None:
+                    on_attempt(response, error)
+
+            if attempt >= self.max_retries:
+                logger.error(f"达到最大重试次数 {self.max_retries}，放弃请求")
+            elif not self.retry_budget.try_spend():
+                logger.error("全局重试预算已耗尽，放弃请求")
+            else:
+                delay = self._backoff(attempt, response)
+                attempt += 1
+                logger.info(f"将在 {delay:.2f} 秒后进行第 {attempt} 次重试...")
+                time.sleep(delay)
+                continue
+
+            if response is not None:
+                return response
+            raise error
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport():
+    """进程内共享的默认传输层，多个爬虫实例共用同一个连接池和重试预算"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
@@ -0,0 +1,104 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+try:
+    from scrapers.checkpoint import atomic_write_json
+except ImportError:  # 直接以脚本方式运行时
+    from checkpoint import atomic_write_json
+
+logger = logging.getLogger("WeiboIdIndex")
+
+# 参与指纹计算的字段：内容或互动数变化都视为微博已更新
+FINGERPRINT_FIELDS = ('内容', '转发数', '评论数', '点赞数')
+
+
+def weibo_fingerprint(record):
+    """根据内容和互动数计算微博指纹"""
+    parts = []
+    for field in FINGERPRINT_FIELDS:
+        value = record.get(field, '')
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            value = ''
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        parts.append(str(value))
+    return hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class WeiboIdIndex:
+    """
+    按关键词持久化的微博ID索引（微博ID -> 指纹），用于增量爬取
+    索引文件不存在时，从 data_path 下该关键词以前的输出文件（csv/xlsx）构建
+    """
+    def __init__(self, keyword, data_path):
+        self.keyword = keyword
+        self.data_path = data_path
+        self.path = os.path.join(data_path, "index", f"weibo_{keyword}_ids.json")
+        self.fingerprints = {}
+
+    @classmethod
+    def load(cls, keyword, data_path):
+        index = cls(keyword, data_path)
+        if os.path.exists(index.path):
+            with open(index.path, 'r', encoding='utf-8') as f:
+                index.fingerprints = json.load(f)
+        else:
+            index.build_from_outputs()
+        logger.info(f"关键词 {keyword} 的ID索引包含 {len(index.fingerprints)} 条微博")
+        return index
+
+    def _output_files(self):
+        """该关键词以前的输出文件；同名的csv和xlsx只读取csv"""
+        pattern = os.path.join(glob.escape(self.data_path), f"*weibo_{glob.escape(self.keyword)}_*")
+        files = {}
+        for path in sorted(glob.glob(pattern)):
+            stem, ext = os.path.splitext(path)
+            if ext == '.csv' or (ext == '.xlsx' and stem not in files):
+                files[stem] = path
+        return sorted(files.values())
+
+    def build_from_outputs(self):
+        for path in self._output_files():
+            try:
+                if path.endswith('.csv'):
+                    df = pd.read_csv(path, dtype={'微博ID': str})
+                else:
+                    df = pd.read_excel(path, dtype={'微博ID': str}, engine='openpyxl')
+            except Exception as e:
+                logger.warning(f"读取历史输出 {path} 失败: {e}")
+                continue
+            if '微博ID' not in df.columns:
+                continue
+            self.update(df.to_dict('records'))
+        logger.info(f"从历史输出构建ID索引，共 {len(self.fingerprints)} 条微博")
+
+    def __contains__(self, weibo_id):
+        return str(weibo_id) in self.fingerprints
+
+    def known_ratio(self, records):
+        """一页记录中已见过的微博所占比例"""
+        ids = [str(r.get('微博ID', '')) for r in records if r.get('微博ID', '') != '']
+        if not ids:
+            return 0.0
+        return sum(1 for i in ids if i in self.fingerprints) / len(ids)
+
+    def filter_new(self, records):
+        """只保留新出现或内容/互动数有变化的微博"""
+        return [r for r in records
+                if self.fingerprints.get(str(r.get('微博ID', ''))) != weibo_fingerprint(r)]
+
+    def update(self, records):
+        for record in records:
+            weibo_id = record.get('微博ID', '')
+            if weibo_id is None or weibo_id == '' or (isinstance(weibo_id, float) and pd.isna(weibo_id)):
+                continue
+            self.fingerprints[str(weibo_id)] = weibo_fingerprint(record)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write_json(self.path, self.fingerprints)
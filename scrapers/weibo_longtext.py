@@ -0,0 +1,98 @@
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("LongTextExpander")
+
+LONG_TEXT_URL = "https://m.weibo.cn/statuses/extend"
+
+
+def fetch_long_text(transport, weibo_id, headers, on_attempt=None, timeout=10, url=LONG_TEXT_URL):
+    """
+    请求一条长微博的全文HTML，返回 (全文, 响应)，获取失败时全文为 None；
+    响应交给调用方判断是否被重定向到登录页等情况
+    """
+    response = transport.get(url, params={'id': weibo_id}, headers=headers,
+                             timeout=timeout, on_attempt=on_attempt)
+    if response.status_code != 200:
+        return None, response
+    try:
+        data = response.json()
+    except ValueError:
+        # Cookie失效时会返回登录页HTML
+        return None, response
+    return (data.get('data') or {}).get('longTextContent') or None, response
+
+
+class LongTextExpander:
+    """
+    长微博全文补全：搜索结果中 isLongText 的微博正文是截断的，
+    按批次收集截断微博的ID，用有界线程池并发请求全文后写入单独的全文列
+    最近获取的全文按微博ID缓存在内存中（LRU，最多 cache_size 条），同一ID不重复请求
+    参数:
+        fetch: 根据微博ID返回全文HTML的函数，失败时返回 None
+        concurrency: 同时在途的全文请求数
+        cache_size: 内存中缓存的全文条数上限，0 表示不缓存
+    """
+    def __init__(self, fetch, concurrency=4, cache_size=2000):
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.cache_size = cache_size
+        self.expanded = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self._texts = OrderedDict()
+
+    def _remember(self, weibo_id, text):
+        if self.cache_size <= 0:
+            return
+        self._texts[weibo_id] = text
+        self._texts.move_to_end(weibo_id)
+        while len(self._texts) > self.cache_size:
+            self._texts.popitem(last=False)
+
+    def _fetch_one(self, weibo_id):
+        try:
+            return self.fetch(weibo_id)
+        except Exception as e:
+            logger.warning(f"获取微博 {weibo_id} 全文出错: {e}")
+            return None
+
+    def expand(self, df, flag='长文本', source='内容', target='全文', id_column='微博ID'):
+        """
+        DataFrame 批次处理函数：target 列为 source 列的副本，flag 列为真的行替换为全文，
+        获取失败的行保留截断文本；source 列保持搜索结果中的原文，增量索引的指纹不受补全影响
+        """
+        if flag not in df.columns or source not in df.columns:
+            return df
+        df[target] = df[source]
+        truncated = df[flag].fillna(False).astype(bool)
+        if not truncated.any():
+            return df
+
+        ids = df.loc[truncated, id_column].astype(str)
+        texts = {}
+        missing = []
+        for weibo_id in ids.unique():
+            if weibo_id in self._texts:
+                self._texts.move_to_end(weibo_id)
+                texts[weibo_id] = self._texts[weibo_id]
+                self.cache_hits += 1
+            else:
+                missing.append(weibo_id)
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as executor:
+                for weibo_id, text in zip(missing, executor.map(self._fetch_one, missing)):
+                    if text:
+                        texts[weibo_id] = text
+                        self._remember(weibo_id, text)
+
+        full = ids.map(texts)
+        found = full.notna()
+        df.loc[full.index[found], target] = full[found]
+        self.expanded += int(found.sum())
+        self.failed += int((~found).sum())
+        return df
+
+    def stats(self):
+        return {'expanded': self.expanded, 'failed': self.failed, 'cache_hits': self.cache_hits}
@@ -1,27 +1,62 @@
-import requests
 import json
 import time
 import random
-from fake_useragent import UserAgent
 import pandas as pd
 from datetime import datetime
+from functools import partial
 import os
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+try:
+    from scrapers.transport import get_default_transport
+    from scrapers.rate_limiter import TokenBucket
+    from scrapers.identity_pool import get_default_identity_pool
+    from scrapers.weibo_index import WeiboIdIndex
+    from scrapers.sinks import ExcelSink, TransformSink
+    from scrapers.weibo_time import add_normalized_time
+    from scrapers.weibo_text import add_clean_text, EXPANDED_TEXT_FIELDS
+    from scrapers.weibo_longtext import LongTextExpander, fetch_long_text
+except ImportError:  # 直接以脚本方式运行时
+    from transport import get_default_transport
+    from rate_limiter import TokenBucket
+    from identity_pool import get_default_identity_pool
+    from weibo_index import WeiboIdIndex
+    from sinks import ExcelSink, TransformSink
+    from weibo_time import add_normalized_time
+    from weibo_text import add_clean_text, EXPANDED_TEXT_FIELDS
+    from weibo_longtext import LongTextExpander, fetch_long_text
+
 class WeiboScraper:
-    def __init__(self):
-        self.ua = UserAgent()
+    def __init__(self, transport=None, identity_pool=None, requests_per_minute=20, burst=3):
+        """
+        参数:
+            requests_per_minute / burst: 搜索页和长微博全文请求共用的令牌桶速率（次/分钟）和容量
+        """
+        # User-Agent、Accept-Language、Referer 由身份池按请求提供，身份池第一次取用时才加载
+        self.identity_pool = identity_pool or get_default_identity_pool()
         self.headers = {
-            'User-Agent': self.ua.random,
             'Cookie': '0a00d77517403723530526190e78f19ba48b60c3c7c84b1fcd6d106d84aa48',  # 这里需要填入微博的 Cookie
             'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9',
         }
         self.search_url = "https://m.weibo.cn/api/container/getIndex"
         self.data_path = "data/weibo"
         os.makedirs(self.data_path, exist_ok=True)
+        # 与完整版爬虫共享连接池和重试预算
+        self.transport = transport or get_default_transport()
+        # 搜索页和全文请求共用一个令牌桶，并发的全文请求同样受限速约束
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0, capacity=burst)
+        # 截断的长微博按批次并发补全全文
+        self.long_text = LongTextExpander(self._fetch_long_text, concurrency=2)
+
+    def _headers(self):
+        return {**self.headers, **self.identity_pool.random()}
+
+    def _fetch_long_text(self, weibo_id):
+        self.rate_limiter.acquire()
+        text, _ = fetch_long_text(self.transport, weibo_id, self._headers())
+        return text
 
     def search_weibo(self, keyword, page):
         """
@@ -34,9 +69,10 @@ class WeiboScraper:
         }
         
         try:
-            response = requests.get(
+            self.rate_limiter.acquire()
+            response = self.transport.get(
                 self.search_url,
-                headers=self.headers,
+                headers=self._headers(),
                 params=params
             )
             return response.json()
@@ -56,15 +92,16 @@ class WeiboScraper:
             '点赞数': mblog.get('attitudes_count', 0),
             '用户名': mblog.get('user', {}).get('screen_name', ''),
             '发布时间': mblog.get('created_at', ''),
-            '微博ID': mblog.get('id', '')
+            '微博ID': mblog.get('id', ''),
+            '长文本': bool(mblog.get('isLongText', False)),
+            '抓取时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
-    def scrape_and_save(self, keyword, max_pages=10):
+    def iter_records(self, keyword, max_pages=10, index=None):
         """
-        爬取并保存数据
+        逐页获取并惰性解析，记录逐条产出
+        index: 增量模式下的 WeiboIdIndex，只产出新出现或有变化的微博，遇到以旧微博为主的页面时停止
         """
-        all_weibos = []
-        
         for page in range(1, max_pages + 1):
             print(f"正在爬取第 {page} 页...")
             data = self.search_weibo(keyword, page)
@@ -73,23 +110,49 @@ class WeiboScraper:
                 break
                 
             cards = data['data']['cards']
-            for card in cards:
-                if card.get('card_type') == 9:  # 微博卡片类型
-                    parsed_weibo = self.parse_weibo(card)
-                    all_weibos.append(parsed_weibo)
+            page_weibos = (self.parse_weibo(card) for card in cards
+                           if card.get('card_type') == 9)  # 微博卡片类型
+            
+            if index is not None:
+                page_weibos = list(page_weibos)
+                mostly_known = index.known_ratio(page_weibos) >= 0.8
+                yield from index.filter_new(page_weibos)
+                if mostly_known:
+                    print(f"第 {page} 页以已见微博为主，增量爬取结束")
+                    break
+            else:
+                yield from page_weibos
             
             # 随机延迟，避免被封
             time.sleep(random.uniform(2, 5))
+
+    def scrape_and_save(self, keyword, max_pages=10, incremental=False, return_df=False):
+        """
+        爬取并保存数据，记录边爬取边写入Excel
+        incremental: 增量模式，只保存新出现或有变化的微博，遇到以旧微博为主的页面时停止
+        return_df: 是否读回Excel并返回 DataFrame，默认只返回写入的记录数
+        """
+        index = WeiboIdIndex.load(keyword, self.data_path) if incremental else None
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"{self.data_path}/weibo_{keyword}_{timestamp}.xlsx"
+        
+        # 保存为Excel格式，按批次标准化发布时间、补全长微博并把正文HTML清洗为纯文本
+        transforms = [add_normalized_time, self.long_text.expand,
+                      partial(add_clean_text, fields=EXPANDED_TEXT_FIELDS)]
+        with TransformSink([ExcelSink(filename)], transforms) as sink:
+            for record in self.iter_records(keyword, max_pages, index):
+                sink.write(record)
+                if index is not None:
+                    index.update([record])
         
-        # 保存为Excel格式
-        if all_weibos:
-            df = pd.DataFrame(all_weibos)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{self.data_path}/weibo_{keyword}_{timestamp}.xlsx"
-            df.to_excel(filename, index=False, engine='openpyxl')
+        if sink.count:
             print(f"数据已保存到: {filename}")
-            return df
-        return None
+            if index is not None:
+                index.save()
+            if return_df:
+                return pd.read_excel(filename, dtype={'微博ID': str}, engine='openpyxl')
+            return sink.count
+        return None if return_df else 0
 
     def analyze_data(self, df):
         """
@@ -117,5 +180,5 @@ class WeiboScraper:
 if __name__ == "__main__":
     scraper = WeiboScraper()
     keyword = "哈尔滨冰雪大世界"
-    df = scraper.scrape_and_save(keyword)
+    df = scraper.scrape_and_save(keyword, return_df=True)
     scraper.analyze_data(df) 
\ No newline at end of file
@@ -1,16 +1,42 @@
-import requests
 import json
 import time
-import random
-from fake_useragent import UserAgent
 import pandas as pd
 from datetime import datetime
 import os
 import logging
+import asyncio
+import queue
+import threading
+from contextlib import closing
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+try:
+    from scrapers.rate_limiter import TokenBucket, AIMDController
+    from scrapers.transport import get_default_transport
+    from scrapers.identity_pool import get_default_identity_pool
+    from scrapers.checkpoint import CrawlCheckpoint, MemoryCheckpoint
+    from scrapers.sinks import CsvSink, ExcelSink, TransformSink
+    from scrapers.weibo_index import WeiboIdIndex
+    from scrapers.response_cache import ResponseCache
+    from scrapers.weibo_time import add_normalized_time, DEFAULT_TZ
+    from scrapers.weibo_text import add_clean_text, EXPANDED_TEXT_FIELDS
+    from scrapers.weibo_longtext import LongTextExpander, LONG_TEXT_URL, fetch_long_text
+except ImportError:  # 直接以脚本方式运行时
+    from rate_limiter import TokenBucket, AIMDController
+    from transport import get_default_transport
+    from identity_pool import get_default_identity_pool
+    from checkpoint import CrawlCheckpoint, MemoryCheckpoint
+    from sinks import CsvSink, ExcelSink, TransformSink
+    from weibo_index import WeiboIdIndex
+    from response_cache import ResponseCache
+    from weibo_time import add_normalized_time, DEFAULT_TZ
+    from weibo_text import add_clean_text, EXPANDED_TEXT_FIELDS
+    from weibo_longtext import LongTextExpander, LONG_TEXT_URL, fetch_long_text
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -18,71 +44,195 @@ logging.basicConfig(
 )
 logger = logging.getLogger("WeiboScraper")
 
-class WeiboScraper:
+# 表示被限流或封禁的状态码
+THROTTLE_STATUS_CODES = (403, 418, 429)
+
+# 并发获取阶段结束的标记
+_PAGES_DONE = object()
+
+
+class _CrawlState:
+    """获取阶段与解析阶段共享的停止条件，解析阶段可以要求获取阶段不再派发某页之后的页面"""
     def __init__(self):
-        self.ua = UserAgent()
+        self.stop_page = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def stop_at(self, page):
+        with self._lock:
+            if self.stop_page is None or page < self.stop_page:
+                self.stop_page = page
+
+    def cancel(self):
+        self.cancelled = True
+
+    def allows(self, page):
+        return not self.cancelled and (self.stop_page is None or page < self.stop_page)
+
+
+class WeiboScraper:
+    def __init__(self, pages_per_minute=20, burst=3, transport=None,
+                 min_pages_per_minute=3, max_pages_per_minute=120, cache=None, offline=False,
+                 expand_long_text=True, long_text_concurrency=4, identity_pool=None):
+        """
+        参数:
+            pages_per_minute: 初始请求速率（页/分钟），之后由AIMD控制器根据响应自动调整
+            burst: 令牌桶容量，允许的最大突发请求数
+            transport: HttpTransport 实例，默认使用进程内共享的连接池
+            min_pages_per_minute / max_pages_per_minute: 自适应速率的上下限
+            cache: 可选的 ResponseCache 实例（True 表示使用 data/weibo/cache 下的默认缓存），
+                   命中缓存的页面不发请求也不占用速率配额
+            offline: 离线模式，只从缓存读取，不发送任何网络请求
+            expand_long_text: 是否为截断的长微博补全全文
+            long_text_concurrency: 同时在途的全文请求数，全文请求同样受令牌桶限速
+            identity_pool: IdentityPool 实例，默认使用进程内共享的身份池
+        """
+        # User-Agent、Accept-Language、Referer 由身份池按请求提供，身份池第一次取用时才加载
+        self.identity_pool = identity_pool or get_default_identity_pool()
         self.headers = {
-            'User-Agent': self.ua.random,
             'Cookie': '0a00d77517403723530526190e78f19ba48b60c3c7c84b1fcd6d106d84aa48',  # 这里需要填入微博的 Cookie
             'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9',
-            'Referer': 'https://m.weibo.cn/search?containerid=100103type%3D1%26q%3D'
         }
         self.search_url = "https://m.weibo.cn/api/container/getIndex"
+        self.long_text_url = LONG_TEXT_URL
         self.data_path = "data/weibo"
+        self.checkpoint_path = os.path.join(self.data_path, "checkpoints")
         os.makedirs(self.data_path, exist_ok=True)
-        self.max_retries = 5  # 最大重试次数
+        self.transport = transport or get_default_transport()
+        # 并发模式下所有在途请求共享同一个令牌桶，其速率由AIMD控制器调整
+        self.rate_limiter = TokenBucket(pages_per_minute / 60.0, capacity=burst)
+        self.rate_controller = AIMDController(
+            pages_per_minute / 60.0,
+            min_rate=min_pages_per_minute / 60.0,
+            max_rate=max_pages_per_minute / 60.0,
+            bucket=self.rate_limiter
+        )
+        # 增量模式：一页中已见微博占比达到该阈值即视为旧页，连续若干旧页后停止
+        self.incremental_known_ratio = 0.8
+        self.incremental_stop_pages = 2
+        if cache is True:
+            cache = ResponseCache(os.path.join(self.data_path, "cache"))
+        self.cache = cache
+        self.offline = offline
+        if offline and cache is None:
+            raise ValueError("离线模式需要提供 cache")
+        # 长微博全文很少变化，缓存有效期比搜索页长
+        self.long_text_ttl = 7 * 24 * 3600
+        self.long_text = (LongTextExpander(self._fetch_long_text, concurrency=long_text_concurrency)
+                          if expand_long_text else None)
 
     def _update_user_agent(self):
-        """随机更新User-Agent"""
-        self.headers['User-Agent'] = self.ua.random
-        return self.headers
+        """为本次请求随机选取一个身份，返回新的请求头，不修改 self.headers"""
+        return {**self.headers, **self.identity_pool.random()}
 
-    def search_weibo(self, keyword, page, retry_count=0):
-        """
-        搜索微博，增加重试机制
-        """
-        params = {
+    def _observe_attempt(self, response, error):
+        """transport 每次尝试后的回调：非200响应和网络错误都视为降速信号"""
+        if error is not None:
+            self.rate_controller.record_failure(f"网络错误 {type(error).__name__}")
+        elif response.status_code in THROTTLE_STATUS_CODES:
+            self.rate_controller.record_failure(f"限流状态码 {response.status_code}")
+        elif response.status_code != 200:
+            self.rate_controller.record_failure(f"状态码 {response.status_code}")
+
+    def _is_login_redirect(self, response):
+        """Cookie失效时接口会被重定向到登录页"""
+        url = response.url or ''
+        return 'passport.weibo' in url or '/login' in url or '/signin' in url
+
+    def _search_params(self, keyword, page):
+        return {
             'containerid': '100103type=1&q=' + keyword,
             'page_type': 'searchall',
             'page': page
         }
+
+    def _cached_page(self, keyword, page):
+        """从响应缓存读取页面，未启用缓存或未命中时返回 None"""
+        if self.cache is None:
+            return None
+        data = self.cache.get(self.search_url, self._search_params(keyword, page))
+        if data is not None:
+            logger.info(f"页面 {page} 命中缓存")
+        return data
+
+    def search_weibo(self, keyword, page):
+        """
+        搜索微博：优先读取响应缓存，未命中时再请求接口
+        """
+        data = self._cached_page(keyword, page)
+        if data is not None:
+            return data
+        return self._request_page(keyword, page)
+
+    def _request_page(self, keyword, page):
+        """
+        请求接口获取一页搜索结果，重试和连接复用由 self.transport 负责，
+        每个响应都会反馈给 self.rate_controller 以调整请求速率
+        """
+        if self.offline:
+            logger.warning(f"离线模式下页面 {page} 未命中缓存")
+            return None
+
+        params = self._search_params(keyword, page)
         
         try:
             # 每次请求都更新User-Agent
             headers = self._update_user_agent()
             logger.info(f"开始请求页面 {page}")
             
-            response = requests.get(
+            response = self.transport.get(
                 self.search_url,
                 headers=headers,
                 params=params,
-                timeout=15  # 设置超时时间
+                timeout=15,  # 设置超时时间
+                on_attempt=self._observe_attempt
             )
             
             if response.status_code != 200:
-                logger.warning(f"页面 {page} 请求失败，状态码: {response.status_code}")
-                if retry_count < self.max_retries:
-                    retry_delay = 5 + random.uniform(1, 5) * retry_count
-                    logger.info(f"将在 {retry_delay:.2f} 秒后重试...")
-                    time.sleep(retry_delay)
-                    return self.search_weibo(keyword, page, retry_count + 1)
-                else:
-                    logger.error(f"页面 {page} 达到最大重试次数，放弃请求")
-                    return None
+                logger.error(f"页面 {page} 请求失败，状态码: {response.status_code}，放弃请求")
+                return None
+            
+            if self._is_login_redirect(response):
+                self.rate_controller.record_failure("跳转登录页")
+                logger.error(f"页面 {page} 被重定向到登录页，请检查Cookie")
+                return None
             
             json_data = response.json()
+            # 空卡片页通常是被软限流的表现，不写入缓存
+            if (json_data.get('data') or {}).get('cards'):
+                self.rate_controller.record_success()
+                if self.cache is not None:
+                    self.cache.put(self.search_url, params, json_data)
+            else:
+                self.rate_controller.record_failure("空卡片页")
             return json_data
         except Exception as e:
-            logger.error(f"请求出错: {e}")
-            if retry_count < self.max_retries:
-                retry_delay = 5 + random.uniform(1, 5) * retry_count
-                logger.info(f"将在 {retry_delay:.2f} 秒后重试...")
-                time.sleep(retry_delay)
-                return self.search_weibo(keyword, page, retry_count + 1)
-            else:
-                logger.error(f"页面 {page} 达到最大重试次数，放弃请求")
-                return None
+            logger.error(f"页面 {page} 请求出错: {e}，放弃请求")
+            return None
+
+    def _fetch_long_text(self, weibo_id):
+        """获取一条长微博的全文：优先读取缓存，请求前从令牌桶取令牌"""
+        params = {'id': weibo_id}
+        if self.cache is not None:
+            text = self.cache.get(self.long_text_url, params)
+            if text is not None:
+                return text
+        if self.offline:
+            return None
+
+        self.rate_limiter.acquire()
+        text, response = fetch_long_text(self.transport, weibo_id, self._update_user_agent(),
+                                         on_attempt=self._observe_attempt, url=self.long_text_url)
+        if self._is_login_redirect(response):
+            self.rate_controller.record_failure("跳转登录页")
+            return None
+        if text is None:
+            logger.warning(f"微博 {weibo_id} 全文获取失败，状态码: {response.status_code}")
+            return None
+        self.rate_controller.record_success()
+        if self.cache is not None:
+            self.cache.put(self.long_text_url, params, text, ttl=self.long_text_ttl)
+        return text
 
     def parse_weibo(self, card):
         """
@@ -108,125 +258,485 @@ class WeiboScraper:
             '用户ID': mblog.get('user', {}).get('id', ''),
             '发布时间': created_at,
             '微博ID': mblog.get('id', ''),
-            '微博来源': mblog.get('source', '')
+            '微博来源': mblog.get('source', ''),
+            # 长微博在搜索结果中只有截断的正文，写入前由 self.long_text 补全到"全文"列
+            '长文本': bool(mblog.get('isLongText', False)),
+            # 相对时间（"5分钟前"）以抓取时间为基准换算
+            '抓取时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
-    def scrape_and_save(self, keyword, max_pages=None, save_interval=20):
+    def _parse_cards(self, cards):
+        """惰性地从卡片列表中解析出微博记录"""
+        return (self.parse_weibo(card) for card in cards if card.get('card_type') == 9)  # 9 为微博卡片类型
+
+    def _is_last_page(self, data, next_page):
+        """根据API返回的页码信息判断是否已经没有更多数据"""
+        cardlist_info = (data.get('data') or {}).get('cardlistInfo') or {}
+        if 'page' not in cardlist_info:
+            return False
+        current_page = cardlist_info.get('page') or 1
+        # 如果API返回的当前页码小于我们正在请求的页码，说明已经到达末尾
+        return int(current_page) < next_page
+
+    @staticmethod
+    def _run_start(pages, page, length):
+        """响应可能乱序到达：返回包含 page 的、长度为 length 的连续页区间起点，不存在时返回 None"""
+        for first in range(page - length + 1, page + 1):
+            if all(p in pages for p in range(first, first + length)):
+                return first
+        return None
+
+    def _checkpoint_file(self, keyword):
+        return os.path.join(self.checkpoint_path, f"weibo_{keyword}.json")
+
+    def _open_checkpoint(self, keyword, resume):
+        """恢复模式下读取已有断点并恢复速率控制器状态，否则新建断点"""
+        path = self._checkpoint_file(keyword)
+        if resume:
+            checkpoint = CrawlCheckpoint.load(path)
+            if checkpoint is not None:
+                self.rate_controller.load_state(checkpoint.controller_state)
+                return checkpoint
+            logger.warning(f"未找到关键词 {keyword} 的断点，将从第1页开始爬取")
+        checkpoint = CrawlCheckpoint(path, keyword)
+        checkpoint.clear()
+        return checkpoint
+
+    def _default_sinks(self, keyword):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = f"{self.data_path}/weibo_{keyword}_complete_{timestamp}"
+        # CSV便于后续处理，Excel便于直接查看
+        return [CsvSink(f"{base}.csv"), ExcelSink(f"{base}.xlsx")]
+
+    def scrape_and_save(self, keyword, max_pages=None, save_interval=20, concurrency=None,
+                        resume=False, incremental=False, sinks=None, return_df=False,
+                        shards=None, shard_concurrency=4):
         """
-        爬取并保存数据
+        爬取并保存数据：记录从 iter_records 流式产出，批量写入各个输出端，
+        爬取过程中内存占用不随页数增长
         参数:
             keyword: 搜索关键词
             max_pages: 最大页数，None表示爬取所有可用页面
-            save_interval: 每爬取多少页保存一次数据
+            save_interval: 每爬取多少页强制刷新一次输出端，避免爬取中断导致数据丢失
+            concurrency: 同时在途的页面请求数，None表示逐页串行爬取；
+                         设置后使用 asyncio 并发模式，速率由 self.rate_limiter 控制
+            resume: 是否从上次中断的断点继续爬取
+            incremental: 增量模式，只输出新出现或有变化的微博，
+                         连续遇到以旧微博为主的页面时停止爬取
+            sinks: 输出端列表（BatchSink 子类实例），默认同时输出CSV和Excel；
+                   写入前按批次把发布时间标准化为"标准发布时间"列，
+                   为截断的长微博补全"全文"列，并把正文HTML清洗为纯文本，提取话题、提及和链接
+            return_df: 是否在结束后读回CSV并返回 DataFrame；默认只返回写入的记录数，
+                       数据留在输出文件中，不会整体载入内存
+            shards: 分片查询列表（见 weibo_shards.sub_query_shards），
+                    设置后各分片并发爬取，结果按微博ID合并去重；分片模式不支持断点恢复
+            shard_concurrency: 同时爬取的分片数，所有分片共享 self.rate_limiter 的速率
+        """
+        if shards and resume:
+            raise ValueError("分片模式不支持断点恢复")
+        checkpoint = MemoryCheckpoint(keyword) if shards else self._open_checkpoint(keyword, resume)
+        index = WeiboIdIndex.load(keyword, self.data_path) if incremental else None
+        outputs = sinks if sinks is not None else self._default_sinks(keyword)
+        transforms = [add_normalized_time]
+        if self.long_text is not None:
+            # 全文补全必须在HTML清洗之前，补全后清洗"全文"列
+            transforms.append(self.long_text.expand)
+            transforms.append(partial(add_clean_text, fields=EXPANDED_TEXT_FIELDS))
+        else:
+            transforms.append(add_clean_text)
+        sinks = [TransformSink(outputs, transforms)]
+
+        def write(record):
+            for sink in sinks:
+                sink.write(record)
+
+        total = 0
+        shard_failures = {}  # 分片 -> 请求失败的页码
+        try:
+            # 先把断点中已有的记录写入输出端，增量模式下同样计入索引
+            for record in checkpoint.iter_records():
+                write(record)
+                total += 1
+                if index is not None:
+                    index.update([record])
+            if total or checkpoint.last_page:
+                logger.info(f"从断点恢复: 已完成 {checkpoint.last_page} 页，已有 {total} 条微博")
+
+            if shards:
+                records = self._iter_sharded_records(shards, max_pages, concurrency,
+                                                     shard_concurrency, index, shard_failures)
+            else:
+                records = self._iter_page_records(keyword, max_pages, concurrency, checkpoint, index)
+
+            pages_done = 0
+            for page, record in records:
+                if record is None:
+                    # 一页处理完毕
+                    pages_done += 1
+                    if pages_done % save_interval == 0:
+                        for sink in sinks:
+                            sink.flush()
+                        logger.info(f"已处理 {pages_done} 页，累计 {total} 条微博，输出已刷新")
+                    continue
+                write(record)
+                total += 1
+                if index is not None:
+                    index.update([record])
+        finally:
+            for sink in sinks:
+                sink.close()
+
+        if shard_failures:
+            # 分片模式没有断点，只能列出失败的分片，之后单独重新爬取
+            logger.warning(f"{len(shard_failures)} 个分片有请求失败的页，分片模式不支持断点恢复，"
+                           f"可对这些分片重新爬取: {shard_failures}")
+        if checkpoint.failed_pages:
+            # 请求失败的页还没有爬到，保留断点以便之后恢复
+            logger.warning(f"第 {sorted(checkpoint.failed_pages)} 页请求失败，已保留断点，"
+                           f"可稍后使用 resume 继续爬取")
+        if not total:
+            logger.warning("未获取到任何微博数据")
+            if not checkpoint.failed_pages:
+                checkpoint.clear()
+            return None if return_df else 0
+
+        logger.info(f"爬取完成，共获取 {total} 条微博数据，"
+                    f"最终速率状态: {self.rate_controller.stats()}")
+        if self.cache is not None:
+            logger.info(f"响应缓存统计: {self.cache.stats()}")
+        if self.long_text is not None:
+            logger.info(f"长微博全文补全: {self.long_text.stats()}")
+        if index is not None:
+            index.save()
+        if not checkpoint.failed_pages:
+            checkpoint.clear()
+
+        csv_paths = [sink.path for sink in outputs if isinstance(sink, CsvSink)]
+        if return_df and csv_paths:
+            df = pd.read_csv(csv_paths[0], dtype={'微博ID': str})
+            if '标准发布时间' in df.columns:
+                df['标准发布时间'] = pd.to_datetime(df['标准发布时间'], errors='coerce',
+                                                utc=True).dt.tz_convert(DEFAULT_TZ)
+            return df
+        return total
+
+    def resume(self, keyword, **kwargs):
         """
-        all_weibos = []
-        page = 1
+        从断点继续爬取，参数同 scrape_and_save
+        """
+        return self.scrape_and_save(keyword, resume=True, **kwargs)
+
+    def iter_records(self, keyword, max_pages=None, concurrency=None, checkpoint=None, index=None,
+                     shards=None, shard_concurrency=4):
+        """
+        流式产出微博记录的生成器：页面边获取边解析，记录逐条产出
+        参数同 scrape_and_save；checkpoint / index 可选，未提供时只在本次运行内去重
+        """
+        if shards:
+            records = self._iter_sharded_records(shards, max_pages, concurrency,
+                                                 shard_concurrency, index)
+        else:
+            records = self._iter_page_records(keyword, max_pages, concurrency, checkpoint, index)
+        with closing(records):
+            for _, record in records:
+                if record is not None:
+                    yield record
+
+    def _iter_sharded_records(self, shards, max_pages, concurrency, shard_concurrency, index,
+                              failures=None):
+        """
+        分片爬取：每个分片是独立的分页游标，在线程池中各自运行 _iter_page_records，
+        记录经有界队列汇总后按微博ID去重，产出格式与 _iter_page_records 相同。
+        分片内部使用并发获取阶段，请求统一从共享令牌桶取得配额，总速率不随分片数增加
+        failures: 可选的字典，分片结束后写入 分片 -> 请求失败的页码列表
+        """
+        records = queue.Queue(maxsize=shard_concurrency * 100)
+        state = _CrawlState()
+        seen_ids = set()
+
+        def crawl(shard):
+            count = 0
+            checkpoint = MemoryCheckpoint(shard)
+            shard_records = self._iter_page_records(shard, max_pages, concurrency or 1, checkpoint, index)
+            try:
+                with closing(shard_records):
+                    for item in shard_records:
+                        if state.cancelled:
+                            return count
+                        records.put(item)
+                        count += item[1] is not None
+                return count
+            finally:
+                if checkpoint.failed_pages:
+                    failed = sorted(checkpoint.failed_pages)
+                    logger.warning(f"分片 {shard} 的第 {failed} 页请求失败")
+                    if failures is not None:
+                        failures[shard] = failed
+
+        def run():
+            try:
+                with ThreadPoolExecutor(max_workers=shard_concurrency) as executor:
+                    futures = {executor.submit(crawl, shard): shard for shard in shards}
+                    for future, shard in futures.items():
+                        try:
+                            logger.info(f"分片 {shard} 完成，共 {future.result()} 条微博")
+                        except Exception as e:
+                            logger.error(f"分片 {shard} 爬取出错: {e}")
+            finally:
+                records.put(_PAGES_DONE)
+
+        logger.info(f"开始分片爬取，共 {len(shards)} 个分片，同时爬取 {shard_concurrency} 个")
+        producer = threading.Thread(target=run, name="WeiboShardProducer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = records.get()
+                if item is _PAGES_DONE:
+                    break
+                page, record = item
+                if record is not None:
+                    weibo_id = str(record.get('微博ID', ''))
+                    if weibo_id and weibo_id in seen_ids:
+                        continue
+                    if weibo_id:
+                        seen_ids.add(weibo_id)
+                yield page, record
+        finally:
+            # 调用方提前结束时通知各分片停止，并排空队列让分片线程退出
+            state.cancel()
+            while producer.is_alive() or not records.empty():
+                try:
+                    if records.get(timeout=0.1) is _PAGES_DONE:
+                        break
+                except queue.Empty:
+                    continue
+
+    def _iter_page_records(self, keyword, max_pages, concurrency, checkpoint, index):
+        """
+        流水线的解析阶段：逐页解析卡片，增量过滤、去重并写入断点，
+        产出 (页码, 记录)，每页结束时额外产出 (页码, None)；
+        获取阶段以 None 表示请求失败的页，这些页只记为失败，不算完成
+        """
+        if checkpoint is None:
+            checkpoint = MemoryCheckpoint(keyword)
+        state = _CrawlState()
+        known_pages = set()  # 增量模式下以旧微博为主的页码
+
+        if concurrency:
+            pages = self._iter_pages_concurrent(keyword, max_pages, concurrency, checkpoint, state)
+        else:
+            pages = self._iter_pages_serial(keyword, max_pages, checkpoint.last_page + 1, state)
+
+        with closing(pages):
+            for page, cards in pages:
+                if cards is None:
+                    checkpoint.mark_failed(page)
+                    continue
+                weibos = self._parse_cards(cards)
+                if index is not None and cards:
+                    weibos = list(weibos)
+                    known_ratio = index.known_ratio(weibos)
+                    weibos = index.filter_new(weibos)
+                    logger.info(f"第 {page} 页已见微博占比 {known_ratio:.0%}")
+                    if known_ratio >= self.incremental_known_ratio:
+                        known_pages.add(page)
+                        # 连续多页以旧微博为主，说明已追上上次爬取的位置
+                        first = self._run_start(known_pages, page, self.incremental_stop_pages)
+                        if first is not None:
+                            if state.stop_page is None:
+                                logger.info("连续多页以已见微博为主，增量爬取结束")
+                            state.stop_at(first + self.incremental_stop_pages)
+
+                weibos = checkpoint.mark_page(page, weibos)
+                checkpoint.save(self.rate_controller)
+                if cards:
+                    logger.info(f"第 {page} 页成功解析 {len(weibos)} 条微博")
+                for weibo in weibos:
+                    yield page, weibo
+                yield page, None
+
+    def _iter_pages_serial(self, keyword, max_pages, start_page, state):
+        """
+        流水线的获取阶段（串行）：逐页产出 (页码, 卡片列表)，请求失败的页产出 (页码, None)，
+        页面之间的延迟由速率控制器决定
+        """
+        page = start_page
         empty_page_count = 0  # 连续空页计数
+        failed_page_count = 0  # 连续请求失败计数
         
         logger.info(f"开始爬取关键词: {keyword}")
         
-        while True:
+        while state.allows(page) and (not max_pages or page <= max_pages):
             logger.info(f"正在爬取第 {page} 页...")
-            data = self.search_weibo(keyword, page)
-            
-            # 检查是否成功获取数据
-            if not data or 'data' not in data:
-                logger.warning(f"第 {page} 页无法获取数据")
-                empty_page_count += 1
-                if empty_page_count >= 3:  # 连续3页没有数据，认为已到达末尾
-                    logger.info("连续多页无数据，认为已爬取完毕")
+            data = self._cached_page(keyword, page)
+            # 命中缓存或离线模式下没有发出网络请求，无需等待
+            sent_request = data is None and not self.offline
+            if data is None:
+                # 离线模式下未命中缓存按空页处理，回放到缓存末尾即结束
+                data = {} if self.offline else self._request_page(keyword, page)
+
+            if data is None:
+                # 请求失败不代表没有结果，不计入空页
+                logger.warning(f"第 {page} 页请求失败")
+                yield page, None
+                failed_page_count += 1
+                if failed_page_count >= 3:
+                    logger.error("连续多页请求失败，停止爬取")
                     break
                 page += 1
-                time.sleep(random.uniform(3, 6))
+                if sent_request:
+                    time.sleep(self.rate_controller.next_delay())
                 continue
+            failed_page_count = 0
             
             # 检查是否有卡片数据
-            cards = data.get('data', {}).get('cards', [])
+            cards = (data.get('data') or {}).get('cards', [])
             
             if not cards:
-                logger.warning(f"第 {page} 页没有微博卡片")
+                logger.warning(f"第 {page} 页没有数据或微博卡片")
+                yield page, []
                 empty_page_count += 1
-                if empty_page_count >= 3:
-                    logger.info("连续多页无卡片，认为已爬取完毕")
+                if empty_page_count >= 3:  # 连续3页没有数据，认为已到达末尾
+                    logger.info("连续多页无数据，认为已爬取完毕")
                     break
                 page += 1
-                time.sleep(random.uniform(3, 6))
+                if sent_request:
+                    time.sleep(self.rate_controller.next_delay())
                 continue
             
             # 重置空页计数
             empty_page_count = 0
-            
-            # 解析微博内容
-            weibos_count = 0
-            for card in cards:
-                if card.get('card_type') == 9:  # 微博卡片类型
-                    parsed_weibo = self.parse_weibo(card)
-                    all_weibos.append(parsed_weibo)
-                    weibos_count += 1
-            
-            logger.info(f"第 {page} 页成功解析 {weibos_count} 条微博")
+            yield page, cards
             
             # 检查是否达到最大页数
             if max_pages and page >= max_pages:
                 logger.info(f"已达到设定的最大页数 {max_pages}，停止爬取")
                 break
-                
-            # 每爬取一定页数，保存一次数据，避免爬取中断导致数据丢失
-            if page % save_interval == 0 and all_weibos:
-                self._save_interim_data(keyword, all_weibos, page)
             
-            # 随机延迟，避免被封
-            delay = random.uniform(3, 7)
-            if page % 10 == 0:  # 每10页增加额外延迟
-                delay = random.uniform(10, 15)
-                logger.info(f"已爬取 {page} 页，增加额外延迟 {delay:.2f} 秒...")
-            else:
-                logger.info(f"页面切换延迟 {delay:.2f} 秒...")
-            time.sleep(delay)
+            # 延迟由AIMD控制器根据最近的响应情况决定
+            if sent_request and state.allows(page + 1):
+                delay = self.rate_controller.next_delay()
+                stats = self.rate_controller.stats()
+                logger.info(f"页面切换延迟 {delay:.2f} 秒（当前速率 {stats['rate_per_minute']} 页/分钟，"
+                            f"错误率 {stats['error_ratio']:.1%}）")
+                time.sleep(delay)
             
             page += 1
             
             # 检查是否已经没有更多数据（通过API返回的总数信息）
-            if 'cardlistInfo' in data.get('data', {}) and 'page' in data['data']['cardlistInfo']:
-                current_page = data['data']['cardlistInfo'].get('page', 1)
-                # 如果API返回的当前页码小于我们正在请求的页码，说明已经到达末尾
-                if current_page < page:
-                    logger.info(f"API返回页码 {current_page} 小于请求页码 {page}，判断爬取完毕")
+            if self._is_last_page(data, page):
+                logger.info(f"API返回页码小于请求页码 {page}，判断爬取完毕")
+                break
+
+    def _iter_pages_concurrent(self, keyword, max_pages, concurrency, checkpoint, state):
+        """
+        流水线的获取阶段（并发）：事件循环在后台线程中运行，
+        页面通过有界队列交给调用方，调用方处理不过来时自然形成背压
+        """
+        pages = queue.Queue(maxsize=concurrency * 2)
+        skip_pages = set(checkpoint.completed_pages)
+        start_page = checkpoint.last_page + 1
+
+        def run():
+            try:
+                asyncio.run(self._produce_pages_async(keyword, max_pages, concurrency,
+                                                      start_page, skip_pages, state, pages))
+            except BaseException as e:
+                pages.put(e)
+            finally:
+                pages.put(_PAGES_DONE)
+
+        producer = threading.Thread(target=run, name="WeiboPageProducer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _PAGES_DONE:
                     break
-        
-        # 保存最终数据
-        if all_weibos:
-            df = self._save_final_data(keyword, all_weibos)
-            logger.info(f"爬取完成，共获取 {len(all_weibos)} 条微博数据")
-            return df
-        else:
-            logger.warning("未获取到任何微博数据")
-            return None
-    
-    def _save_interim_data(self, keyword, weibos, current_page):
-        """保存中间数据"""
-        df = pd.DataFrame(weibos)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{self.data_path}/interim_weibo_{keyword}_page{current_page}_{timestamp}.xlsx"
-        df.to_excel(filename, index=False, engine='openpyxl')
-        logger.info(f"已保存中间数据到: {filename}")
-    
-    def _save_final_data(self, keyword, weibos):
-        """保存最终数据"""
-        df = pd.DataFrame(weibos)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{self.data_path}/weibo_{keyword}_complete_{timestamp}.xlsx"
-        
-        # 保存Excel格式
-        df.to_excel(filename, index=False, engine='openpyxl')
-        logger.info(f"全部数据已保存到: {filename}")
-        
-        # 同时保存CSV格式，便于后续处理
-        csv_filename = f"{self.data_path}/weibo_{keyword}_complete_{timestamp}.csv"
-        df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-        logger.info(f"CSV格式数据已保存到: {csv_filename}")
-        
-        return df
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # 调用方提前结束时通知生产者停止派发，并排空队列让在途请求收尾
+            state.cancel()
+            while producer.is_alive() or not pages.empty():
+                try:
+                    if pages.get(timeout=0.1) is _PAGES_DONE:
+                        break
+                except queue.Empty:
+                    continue
+
+    async def _fetch_page_async(self, loop, executor, keyword, page):
+        """命中缓存直接返回；否则先从共享令牌桶取得配额，再在线程池中执行阻塞请求"""
+        data = await loop.run_in_executor(executor, self._cached_page, keyword, page)
+        if data is not None:
+            return page, data
+        if self.offline:
+            # 离线模式下不发请求，也无需等待配额；未命中缓存按空页处理，回放到缓存末尾即结束
+            logger.warning(f"离线模式下页面 {page} 未命中缓存")
+            return page, {}
+        await self.rate_limiter.acquire_async()
+        logger.info(f"正在爬取第 {page} 页...")
+        data = await loop.run_in_executor(executor, self._request_page, keyword, page)
+        return page, data
+
+    async def _produce_pages_async(self, keyword, max_pages, concurrency, start_page,
+                                   skip_pages, state, pages):
+        """
+        并发获取：保持 concurrency 个页面请求在途，响应到达后立即放入队列交给解析阶段。
+        吞吐量只受令牌桶速率限制，不再受串行往返和固定延迟限制。
+        """
+        loop = asyncio.get_running_loop()
+        next_page = start_page
+        empty_pages = set()   # 无卡片的页码
+        failed_pages = set()  # 请求失败的页码
+        pending = set()
+
+        logger.info(f"开始并发爬取关键词: {keyword}（并发数 {concurrency}，"
+                    f"初始速率 {self.rate_limiter.rate * 60:.1f} 页/分钟）")
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                # 补足在途请求
+                while (len(pending) < concurrency and state.allows(next_page)
+                       and (not max_pages or next_page <= max_pages)):
+                    if next_page not in skip_pages:
+                        pending.add(asyncio.ensure_future(
+                            self._fetch_page_async(loop, executor, keyword, next_page)))
+                    next_page += 1
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page, data = task.result()
+                    if data is None:
+                        # 请求失败不代表没有结果，不计入空页
+                        logger.warning(f"第 {page} 页请求失败")
+                        failed_pages.add(page)
+                        first = self._run_start(failed_pages, page, 3)
+                        if first is not None:
+                            if state.stop_page is None:
+                                logger.error("连续多页请求失败，停止爬取")
+                            state.stop_at(first + 3)
+                        pages.put((page, None))
+                        continue
+
+                    cards = (data.get('data') or {}).get('cards', [])
+                    if not cards:
+                        logger.warning(f"第 {page} 页没有数据或微博卡片")
+                        empty_pages.add(page)
+                        first = self._run_start(empty_pages, page, 3)
+                        if first is not None:
+                            if state.stop_page is None:
+                                logger.info("连续多页无数据，认为已爬取完毕")
+                            state.stop_at(first)
+                    elif self._is_last_page(data, page + 1):
+                        logger.info(f"第 {page} 页为API返回的最后一页，判断爬取完毕")
+                        state.stop_at(page + 1)
+
+                    pages.put((page, cards))
 
     def analyze_data(self, df):
         """
@@ -260,5 +770,5 @@ if __name__ == "__main__":
     scraper = WeiboScraper()
     keyword = "哈尔滨冰雪大世界"
     # 不设置max_pages参数，表示爬取所有可用页面
-    df = scraper.scrape_and_save(keyword)
+    df = scraper.scrape_and_save(keyword, return_df=True)
     scraper.analyze_data(df)
\ No newline at end of file
@@ -0,0 +1,6 @@
+def sub_query_shards(keyword, terms):
+    """
+    用附加词把一个关键词拆成多个子查询（关键词本身也作为一个分片），
+    每个子查询是独立的分页游标，各子查询结果有重叠，合并时按微博ID去重
+    """
+    return [keyword] + [f"{keyword} {term}" for term in terms]
@@ -0,0 +1,82 @@
+import html
+import re
+
+import numpy as np
+import pandas as pd
+
+# 拼接各条文本时使用的分隔符，HTML 中不会出现；下面的字符类都排除了它，替换不会跨越两条文本
+_SEP = '\x00'
+
+_FULLTEXT_RE = re.compile(r'<a\b[^>\x00]*href=["\']/status/[^>\x00]*>\s*全文\s*</a>')
+_IMG_RE = re.compile(r'<img\b[^>\x00]*?\balt=["\']([^"\'\x00]*)["\'][^>\x00]*>', re.I)
+_BR_RE = re.compile(r'<br\s*/?>', re.I)
+_TAG_RE = re.compile(r'<[^>\x00]*>')
+# 只替换连续空格和其他空白字符，单个空格不做替换
+_SPACE_RE = re.compile(r'[\t\r\f\v\u3000\xa0][ \t\r\f\v\u3000\xa0]*| [ \t\r\f\v\u3000\xa0]+')
+
+_HASHTAG_RE = re.compile(r'#([^#\n]{1,64})#')
+# @ 前紧跟邮箱用户名中的字符时不是提及；中文紧跟 @ 是常见写法，仍算提及
+_MENTION_RE = re.compile(r'(?<![A-Za-z0-9._%+\-])@([\w\-]{1,30})')
+# 取每个 <a> 的第一个链接属性：微博的短链接把 data-url（t.cn）写在 href 前面
+_LINK_RE = re.compile(r'<a\s[^>]*?\b(?:data-url|href)=["\']([^"\']*)')
+# 站内的话题搜索、用户主页等相对链接和 m.weibo.cn 链接不算外部链接
+_EXTERNAL_LINK_RE = re.compile(r'https?://(?!m\.weibo\.cn/(?:search|p/|n/))')
+
+
+def _strip_html(texts):
+    """把所有文本拼接成一个字符串，用编译好的正则整体替换一次，再拆回各条"""
+    joined = _SEP.join(text.replace(_SEP, '') for text in texts)
+    joined = _FULLTEXT_RE.sub('', joined)
+    joined = _IMG_RE.sub(r'\1', joined)  # 表情图片保留 alt 文本，例如 [哈哈]
+    joined = _BR_RE.sub('\n', joined)
+    joined = _TAG_RE.sub('', joined)
+    joined = html.unescape(joined)
+    joined = _SPACE_RE.sub(' ', joined)
+    joined = joined.replace(' \n', '\n').replace('\n ', '\n')
+    parts = joined.split(_SEP)
+    if len(parts) != len(texts):
+        raise ValueError(f"清洗后拆分出 {len(parts)} 条文本，应为 {len(texts)} 条")
+    return [text.strip() for text in parts]
+
+
+def clean_weibo_html(values):
+    """
+    批量清洗微博正文的HTML，返回与 values 对齐的 DataFrame：
+    纯文本、话题、提及、链接（后三列为逗号分隔的字符串）
+    只对去重后的文本处理一次，结果再按编码广播回所有行
+    """
+    s = pd.Series(values)
+    codes, uniques = pd.factorize(s.astype('object').where(s.notna(), None))
+    raw = [str(value) for value in uniques]
+
+    text = _strip_html(raw) + ['']
+    raw.append('')
+    columns = {
+        '纯文本': text,
+        '话题': [','.join(_HASHTAG_RE.findall(t)) for t in text],
+        '提及': [','.join(_MENTION_RE.findall(t)) for t in text],
+        '链接': [','.join(url for url in _LINK_RE.findall(r) if _EXTERNAL_LINK_RE.match(url))
+               for r in raw],
+    }
+    # 编码 -1（缺失值）对应末尾补上的空串
+    return pd.DataFrame({name: np.array(column, dtype='object')[codes] for name, column in columns.items()},
+                        index=s.index)
+
+
+# 补全长微博后清洗"全文"列，"内容"列保留搜索结果中的原文
+EXPANDED_TEXT_FIELDS = (('全文', ''), ('原微博内容', '原微博'))
+
+
+def add_clean_text(df, fields=(('内容', ''), ('原微博内容', '原微博'))):
+    """
+    对 DataFrame 中的微博正文列做清洗，原始HTML列保持不变
+    fields: (源列, 新列前缀) 列表，例如 内容 -> 纯文本/话题/提及/链接，
+            原微博内容 -> 原微博纯文本/原微博话题/...
+    """
+    for source, prefix in fields:
+        if source not in df.columns:
+            continue
+        cleaned = clean_weibo_html(df[source])
+        for name in cleaned.columns:
+            df[f"{prefix}{name}"] = cleaned[name]
+    return df
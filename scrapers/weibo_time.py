@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_TZ = 'Asia/Shanghai'
+
+# 相对时间单位对应的秒数
+_UNIT_SECONDS = {'秒': 1, '分钟': 60, '小时': 3600, '天': 86400}
+_DAY_OFFSETS = {'今天': 0, '昨天': 1, '前天': 2}
+
+_RELATIVE_PATTERN = r'^(\d+)\s*(秒|分钟|小时|天)前$'
+_DAY_PATTERN = r'^(今天|昨天|前天)\s*(\d{1,2}):(\d{2})$'
+_DATE_PATTERN = r'^(?:(\d{4})-)?(\d{1,2})-(\d{1,2})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?$'
+# 微博接口的完整时间格式，例如 "Sat Feb 15 12:30:00 +0800 2025"
+_RFC_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+_NAT = np.iinfo('int64').min
+# 省略年份的日期最多往前找几年，足够覆盖相邻两个闰年的间隔；月日本身无效时仍为 NaT
+_MAX_ROLLBACK_YEARS = 8
+
+
+def _to_anchor(crawl_time, index, tz):
+    """把抓取时间（标量或逐行的 Series）统一为带时区的 Series"""
+    now = pd.Timestamp.now(tz=tz)
+    if crawl_time is None:
+        return pd.Series(now, index=index)
+    if isinstance(crawl_time, pd.Series):
+        anchor = pd.to_datetime(crawl_time, errors='coerce')
+        anchor = anchor.dt.tz_localize(tz) if anchor.dt.tz is None else anchor.dt.tz_convert(tz)
+        return anchor.fillna(now)
+    anchor = pd.Timestamp(crawl_time)
+    anchor = anchor.tz_localize(tz) if anchor.tz is None else anchor.tz_convert(tz)
+    return pd.Series(anchor, index=index)
+
+
+def _utc_ns(series):
+    """带时区的 datetime Series 转为 UTC 纳秒 int64 数组，NaT 为 _NAT"""
+    return series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def _from_parts(year, month, day, hour, minute, second, tz):
+    parts = pd.DataFrame({
+        'year': year, 'month': month, 'day': day,
+        'hour': hour, 'minute': minute, 'second': second,
+    })
+    return pd.to_datetime(parts, errors='coerce').dt.tz_localize(tz)
+
+
+def _take(values, codes):
+    """按 factorize 得到的编码把每个唯一值上的结果广播回所有行，编码 -1（缺失）对应 NaN"""
+    values = np.append(np.asarray(values, dtype='float64'), np.nan)
+    return values[codes]
+
+
+def normalize_created_at(values, crawl_time=None, tz=DEFAULT_TZ):
+    """
+    把一整列微博 created_at 字符串一次性转换为带时区的 datetime64
+    支持 "刚刚"、"5分钟前"、"3小时前"、"2天前"、"昨天 12:30"、"02-15"、"2024-02-15"
+    以及 "Sat Feb 15 12:30:00 +0800 2025" 等格式；无法识别的记为 NaT
+    先对整列去重，只对唯一值做正则分类，再用 numpy 按编码广播回所有行，
+    与抓取时间的运算全部向量化，不逐行调用Python
+    参数:
+        values: 时间字符串序列
+        crawl_time: 抓取时间，相对时间以它为基准；可以是标量或与 values 对齐的 Series，默认当前时间
+        tz: 结果时区
+    """
+    s = pd.Series(values)
+    index = s.index
+    anchor = _to_anchor(crawl_time, index, tz)
+    codes, uniques = pd.factorize(s.astype('object').where(s.notna(), None))
+    u = pd.Series(uniques, dtype='object').astype('string').str.strip()
+
+    # 在唯一值上分类：相对秒数（含"刚刚"）
+    relative = u.str.extract(_RELATIVE_PATTERN)
+    rel_seconds = (pd.to_numeric(relative[0]) * relative[1].map(_UNIT_SECONDS).astype('float64'))
+    rel_seconds[u.eq('刚刚').fillna(False)] = 0
+    # 今天/昨天/前天 HH:MM，相对抓取当天零点的秒数
+    day = u.str.extract(_DAY_PATTERN)
+    day_seconds = (-day[0].map(_DAY_OFFSETS).astype('float64') * 86400
+                   + pd.to_numeric(day[1]) * 3600 + pd.to_numeric(day[2]) * 60)
+    # [YYYY-]MM-DD [HH:MM[:SS]]
+    date = u.str.extract(_DATE_PATTERN).apply(pd.to_numeric)
+    is_date = date[1].notna()
+    # 完整时间格式，唯一值上直接解析
+    rfc = pd.to_datetime(u.where(~is_date & rel_seconds.isna() & day_seconds.isna()),
+                         format=_RFC_FORMAT, errors='coerce', utc=True)
+    rfc_ns = np.where(rfc.isna(), np.nan,
+                      rfc.dt.tz_convert(None).to_numpy(dtype='datetime64[ns]').astype('int64'))
+
+    # 广播回所有行，在 int64 纳秒（UTC）上与抓取时间运算，避免逐元素的 Timestamp 对象
+    anchor_ns = _utc_ns(anchor)
+    result = np.full(len(s), _NAT, dtype='int64')
+
+    rows = _take(rel_seconds, codes)
+    mask = ~np.isnan(rows)
+    result[mask] = anchor_ns[mask] - (rows[mask] * 1e9).astype('int64')
+
+    rows = _take(day_seconds, codes)
+    mask = ~np.isnan(rows)
+    if mask.any():
+        midnight_ns = _utc_ns(anchor[mask].dt.normalize())
+        result[mask] = midnight_ns + (rows[mask] * 1e9).astype('int64')
+
+    # 省略年份时取抓取时间的年份，若因此落在未来则回退一年；
+    # 该年没有这一天（02-29）时继续往前，直到最近一个有这一天的年份
+    mask = ~np.isnan(_take(date[1], codes))
+    if mask.any():
+        parts = {i: _take(date[i], codes)[mask] for i in range(6)}
+        no_year = np.isnan(parts[0])
+        year = np.where(no_year, anchor[mask].dt.year.to_numpy(), parts[0])
+        time_parts = [np.nan_to_num(parts[i]) for i in (3, 4, 5)]
+        parsed = _utc_ns(_from_parts(year, parts[1], parts[2], *time_parts, tz))
+        rollback = no_year & ((parsed > anchor_ns[mask]) | (parsed == _NAT))
+        for years_back in range(1, _MAX_ROLLBACK_YEARS + 1):
+            if not rollback.any():
+                break
+            parsed[rollback] = _utc_ns(_from_parts(year[rollback] - years_back, parts[1][rollback],
+                                                   parts[2][rollback], *(p[rollback] for p in time_parts), tz))
+            rollback[rollback] = parsed[rollback] == _NAT
+        result[mask] = parsed
+
+    rows = _take(rfc_ns, codes)
+    mask = ~np.isnan(rows)
+    result[mask] = rows[mask].astype('int64')
+
+    result = pd.Series(result.view('datetime64[ns]'), index=index)
+    return result.dt.tz_localize('UTC').dt.tz_convert(tz)
+
+
+def add_normalized_time(df, source='发布时间', target='标准发布时间', crawl_column='抓取时间',
+                        tz=DEFAULT_TZ):
+    """
+    在 DataFrame 中增加标准化的发布时间列，原始字符串保留在 source 列；
+    存在 crawl_column 列时逐行以抓取时间为基准
+    """
+    if source not in df.columns:
+        return df
+    crawl_time = df[crawl_column] if crawl_column in df.columns else None
+    df[target] = normalize_created_at(df[source], crawl_time=crawl_time, tz=tz)
+    return df
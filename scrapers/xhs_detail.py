@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 从详情页读取正文、标签、精确发布时间和IP属地：优先读页面的初始状态，
+# 没有时退回读取DOM；页面还没渲染好时返回 null
+DETAIL_JS = """
+const noteId = arguments[0];
+const state = window.__INITIAL_STATE__;
+const detailMap = state && state.note && state.note.noteDetailMap;
+const note = detailMap && detailMap[noteId] && detailMap[noteId].note;
+if (note && (note.desc !== undefined || note.title)) {
+    return {
+        desc: note.desc || '',
+        tags: (note.tagList || []).map(tag => tag.name).filter(Boolean),
+        time: note.time || null,
+        ip: note.ipLocation || ''
+    };
+}
+const descEl = document.querySelector('#detail-desc, .note-content .desc');
+if (!descEl) return null;
+return {
+    desc: descEl.innerText,
+    tags: Array.from(descEl.querySelectorAll('a.tag')).map(a => a.innerText.replace(/^#/, '')),
+    time: null,
+    ip: ''
+};
+"""
+
+
+class NoteDetailFetcher:
+    """
+    在同一个浏览器中用多个标签页并发打开笔记详情页，补全正文、标签、精确发布时间和IP属地
+    - 每批用 window.open 同时打开 tabs 个详情页，浏览器并行加载，
+      再逐个切换到各标签页读取数据并关闭，最后回到原来的搜索页
+    - 标签页以笔记ID命名，按名字切换，结果按笔记ID合并回记录
+    参数:
+        tabs: 同时打开的标签页数
+        timeout: 每个详情页等待渲染的最长秒数
+    """
+    def __init__(self, tabs=4, timeout=15):
+        self.tabs = tabs
+        self.timeout = timeout
+        self.fetched = 0
+        self.failed = 0
+
+    def _read_tab(self, driver, note_id):
+        driver.switch_to.window(f"note_{note_id}")
+        try:
+            return WebDriverWait(driver, self.timeout, poll_frequency=0.2).until(
+                lambda d: d.execute_script(DETAIL_JS, note_id))
+        finally:
+            driver.close()
+
+    def fetch(self, driver, notes):
+        """打开 notes 中各笔记的详情页，返回 {笔记ID: 详情}；打开失败的笔记不在结果中"""
+        pending = [note for note in notes if note.get('笔记ID') and note.get('链接')]
+        details = {}
+        if not pending:
+            return details
+        main_window = driver.current_window_handle
+        try:
+            for start in range(0, len(pending), self.tabs):
+                batch = pending[start:start + self.tabs]
+                for note in batch:
+                    driver.execute_script("window.open(arguments[0], arguments[1]);",
+                                          note['链接'], f"note_{note['笔记ID']}")
+                for note in batch:
+                    try:
+                        details[note['笔记ID']] = self._read_tab(driver, note['笔记ID'])
+                        self.fetched += 1
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"读取笔记详情失败 {note['笔记ID']}: {type(e).__name__}")
+                driver.switch_to.window(main_window)
+        finally:
+            # 出错时关闭残留的详情页标签
+            for handle in driver.window_handles:
+                if handle != main_window:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(main_window)
+        return details
+
+    def enrich(self, driver, notes):
+        """
+        把详情合并回笔记记录（原地修改）：增加 正文、标签、IP属地 和 发布时间戳，
+        没有取到的字段为空字符串，保证每条记录的列一致
+        """
+        try:
+            details = self.fetch(driver, notes)
+        except Exception as e:
+            print(f"获取笔记详情出错: {e}")
+            details = {}
+        for note in notes:
+            detail = details.get(note.get('笔记ID'))
+            note['正文'] = detail['desc'] if detail else ""
+            note['标签'] = ','.join(detail['tags']) if detail else ""
+            note['IP属地'] = detail.get('ip', "") if detail else ""
+            if detail and detail.get('time'):
+                note['发布时间戳'] = datetime.fromtimestamp(detail['time'] / 1000).strftime(
+                    '%Y-%m-%d %H:%M:%S')
+            else:
+                note['发布时间戳'] = ""
+        return notes
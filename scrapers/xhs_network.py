@@ -0,0 +1,131 @@
+import base64
+import json
+import re
+from datetime import datetime
+
+# 小红书搜索页通过该接口分页加载笔记，页面上的卡片就是由它的响应渲染的
+SEARCH_API_PATTERN = re.compile(r'/api/sns/web/v1/search/notes')
+NOTE_URL = "https://www.xiaohongshu.com/explore/{note_id}"
+_NOTE_ID_RE = re.compile(r'/(?:explore|search_result|discovery/item)/([0-9a-zA-Z]+)')
+
+_COUNT_RE = re.compile(r'([\d.]+)\s*([万wWkK]?)')
+_COUNT_UNITS = {'万': 10000, 'w': 10000, 'W': 10000, 'k': 1000, 'K': 1000, '': 1}
+
+
+def enable_performance_log(options):
+    """让 chromedriver 记录 DevTools 网络事件，需在创建 driver 前调用"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def note_id_from_link(link):
+    """从笔记链接中取出笔记ID，无法识别时返回 None"""
+    match = _NOTE_ID_RE.search(link or '')
+    return match.group(1) if match else None
+
+
+def parse_count(value):
+    """接口中的互动数可能是数字或 '1.2万'、'10+' 之类的字符串"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _COUNT_RE.search(str(value or ''))
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _COUNT_UNITS[match.group(2)])
+
+
+def _publish_time(note_card):
+    """
+    优先使用发布时间的毫秒时间戳，否则返回角标中的发布时间文本（例如 '3天前'、'2023-05-03'）；
+    last_update_time 是最后编辑时间，不能代替发布时间
+    """
+    timestamp = note_card.get('time')
+    if timestamp:
+        return datetime.fromtimestamp(int(timestamp) / 1000)
+    for tag in note_card.get('corner_tag_info') or []:
+        if tag.get('type') == 'publish_time':
+            return tag.get('text')
+    return None
+
+
+def parse_search_response(payload):
+    """
+    把搜索接口的一页响应解析为笔记记录列表
+    发布时间字段为 datetime、时间文本或 None，由调用方统一做日期解析和范围过滤
+    """
+    records = []
+    for item in (payload.get('data') or {}).get('items') or []:
+        note_card = item.get('note_card')
+        if item.get('model_type', 'note') != 'note' or not note_card:
+            continue
+        note_id = item.get('id') or note_card.get('note_id')
+        link = NOTE_URL.format(note_id=note_id)
+        if item.get('xsec_token'):
+            link += f"?xsec_token={item['xsec_token']}&xsec_source=pc_search"
+        interact = note_card.get('interact_info') or {}
+        records.append({
+            '笔记ID': note_id,
+            '标题': note_card.get('display_title') or note_card.get('title') or "未知标题",
+            '用户名': (note_card.get('user') or {}).get('nickname') or "未知用户",
+            '点赞数': parse_count(interact.get('liked_count')),
+            '评论数': parse_count(interact.get('comment_count')),
+            '收藏数': parse_count(interact.get('collected_count')),
+            '链接': link,
+            '发布时间': _publish_time(note_card),
+        })
+    return records
+
+
+class NetworkCapture:
+    """
+    从 chromedriver 的 performance 日志中收集匹配接口的响应体
+    - responseReceived 记下请求ID，loadingFinished 后再通过 CDP 读取响应体
+    - 每次 poll 只返回上次之后新完成的响应，已读取的请求不会重复返回
+    参数:
+        driver: 通过 enable_performance_log 创建的 Chrome driver
+        url_pattern: 需要收集的接口URL正则
+    """
+    def __init__(self, driver, url_pattern=SEARCH_API_PATTERN):
+        self.driver = driver
+        self.url_pattern = url_pattern
+        self.responses = 0
+        self._pending = set()
+        self._seen = set()
+
+    def enable(self):
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        return self
+
+    def poll(self):
+        """读取新的网络事件，返回解析后的 JSON 响应列表"""
+        finished = []
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params') or {}
+            request_id = params.get('requestId')
+            if method == 'Network.responseReceived':
+                url = (params.get('response') or {}).get('url', '')
+                if request_id not in self._seen and self.url_pattern.search(url):
+                    self._pending.add(request_id)
+            elif method == 'Network.loadingFinished' and request_id in self._pending:
+                finished.append(request_id)
+
+        payloads = []
+        for request_id in finished:
+            self._pending.discard(request_id)
+            self._seen.add(request_id)
+            try:
+                result = self.driver.execute_cdp_cmd('Network.getResponseBody',
+                                                     {'requestId': request_id})
+                body = result.get('body', '')
+                if result.get('base64Encoded'):
+                    body = base64.b64decode(body).decode('utf-8')
+                payloads.append(json.loads(body))
+                self.responses += 1
+            except Exception as e:
+                # 响应体可能已被浏览器回收，跳过该页
+                print(f"读取接口响应失败: {e}")
+        return payloads
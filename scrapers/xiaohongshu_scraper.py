@@ -3,17 +3,123 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.action_chains import ActionChains
 import time
 import random
-import pandas as pd
 from datetime import datetime, timedelta
 import os
 import threading
 import sys
 import re
 
+try:
+    from scrapers.sinks import SegmentSink
+    from scrapers.selector_engine import SelectorEngine
+    from scrapers.scrolling import scroll_for_more
+    from scrapers.browser_profile import apply_lean_options, block_resources
+    from scrapers.session_store import SessionStore
+    from scrapers.xhs_detail import NoteDetailFetcher
+    from scrapers.date_range import DateRange
+    from scrapers.xhs_network import (NetworkCapture, enable_performance_log, parse_search_response,
+                                      note_id_from_link)
+except ImportError:  # 直接以脚本方式运行时
+    from sinks import SegmentSink
+    from selector_engine import SelectorEngine
+    from scrolling import scroll_for_more
+    from browser_profile import apply_lean_options, block_resources
+    from session_store import SessionStore
+    from xhs_detail import NoteDetailFetcher
+    from date_range import DateRange
+    from xhs_network import (NetworkCapture, enable_performance_log, parse_search_response,
+                             note_id_from_link)
+
+# 笔记卡片中各字段的候选选择器，逐个元素解析和批量解析共用
+TITLE_SELECTORS = ['h3', '.title', '.content']
+USER_SELECTORS = ['.name', '.author']
+COUNT_SELECTOR = '.count, .like, .comment, .collect'
+# 根据互动数字父元素的HTML判断其类型
+COUNT_KEYWORDS = {
+    'likes': ['like', '点赞'],
+    'comments': ['comment', '评论'],
+    'collects': ['collect', '收藏'],
+}
+TIME_SELECTORS = [
+    '.time',
+    '.date',
+    '.publish-time',
+    'time',
+    '.desc time',
+    '.desc',  # 可能在描述文本中包含时间
+    '.content'  # 可能在内容中包含时间
+]
+TIME_MARKERS = ['年', '月', '日', '天前', '小时前']
+
+# 一次 execute_script 取出新加载的笔记卡片的原始字段，
+# 替代每个笔记数十次 find_element / get_attribute 往返。
+# 第一次调用时安装 MutationObserver，把之后插入页面的 .note-item 放入队列；
+# 每次调用只处理队列中的卡片，并给处理过的卡片打上标记，滚动越深开销也不会增长
+EXTRACT_NOTES_JS = """
+const [titleSelectors, userSelectors, countSelector, countKeywords, timeSelectors, timeMarkers] = arguments;
+if (!window.__noteQueue) {
+    window.__noteQueue = Array.from(document.querySelectorAll('.note-item'));
+    new MutationObserver(mutations => {
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType !== 1) continue;
+                if (node.matches('.note-item')) window.__noteQueue.push(node);
+                else window.__noteQueue.push(...node.querySelectorAll('.note-item'));
+            }
+        }
+    }).observe(document.body, {childList: true, subtree: true});
+}
+const items = window.__noteQueue.splice(0)
+    .filter(item => item.isConnected && !item.dataset.crawled);
+const firstText = (root, selectors) => {
+    for (const selector of selectors) {
+        const el = root.querySelector(selector);
+        if (el) return el.innerText;
+    }
+    return null;
+};
+return items.map(item => {
+    item.dataset.crawled = '1';
+    const anchor = item.querySelector('a');
+    let title = firstText(item, titleSelectors);
+    if (title === null && anchor) title = anchor.getAttribute('title');
+    const counts = {};
+    for (const el of item.querySelectorAll(countSelector)) {
+        const parentHtml = (el.parentElement ? el.parentElement.outerHTML : '').toLowerCase();
+        for (const [kind, words] of Object.entries(countKeywords)) {
+            if (words.some(word => parentHtml.includes(word))) {
+                counts[kind] = el.innerText.trim();
+                break;
+            }
+        }
+    }
+    let timeText = null;
+    search:
+    for (const selector of timeSelectors) {
+        for (const el of item.querySelectorAll(selector)) {
+            if (timeMarkers.some(marker => el.innerText.includes(marker))) {
+                timeText = el.innerText;
+                break search;
+            }
+        }
+    }
+    return {
+        title: title,
+        user: firstText(item, userSelectors),
+        link: anchor ? anchor.href : '',
+        counts: counts,
+        time: timeText
+    };
+});
+"""
+
 class XiaohongshuScraper:
-    def __init__(self):
+    def __init__(self, capture_network=True, lean=False, headless=None, session_store=None,
+                 driver_pool=None, fetch_details=True, detail_tabs=4, start_date='2022-07-01',
+                 end_date='2023-12-31', sort_by_time=False):
         self.chrome_options = Options()
         # self.chrome_options.add_argument('--headless')  # 先不使用无头模式，方便调试
         self.chrome_options.add_argument('--no-sandbox')
@@ -29,6 +135,42 @@ class XiaohongshuScraper:
         print(f"数据将保存到: {self.data_path}")
         self.is_running = True  # 添加运行状态标志
         self.paused = False    # 添加暂停状态标志
+        # 批量解析：每轮只调用一次 execute_script 取出所有笔记，失败时退回逐个元素解析
+        self.batch_extract = True
+        # 逐个元素解析时使用，记住各字段上次命中的选择器
+        self.selectors = SelectorEngine()
+        # 网络捕获：直接解析搜索接口的JSON响应，得到准确的计数、笔记ID和发布时间
+        self.capture_network = capture_network
+        self.capture = None
+        self.seen_note_ids = set()
+        # 逐个元素解析时已处理到的卡片下标，之后只读取新加载的卡片
+        self.parsed_elements = 0
+        if capture_network:
+            enable_performance_log(self.chrome_options)
+        self._apply_profile(lean, headless)
+        # 登录会话：手动登录一次后保存，之后的运行直接注入
+        self.session_store = session_store or SessionStore(
+            'xiaohongshu', path=os.path.join(os.path.dirname(self.data_path), "sessions", "xiaohongshu.json"))
+        # driver 池：多个关键词复用已启动的浏览器，不设置时每次爬取新建并关闭浏览器
+        self.driver_pool = driver_pool
+        # 详情补全：每轮新解析的笔记用多个标签页并发打开详情页，补全正文、标签和精确时间
+        self.detail_fetcher = NoteDetailFetcher(tabs=detail_tabs) if fetch_details else None
+        # 发布日期范围：范围外的笔记在读取其他字段之前跳过；
+        # sort_by_time 时切换到按最新排序，确认越过开始日期后停止
+        self.date_range = DateRange(start_date, end_date)
+        self.sort_by_time = sort_by_time
+
+    def _apply_profile(self, lean, headless):
+        """
+        lean 为 True 时使用轻量配置：拦截图片、视频、字体和统计脚本，限制渲染进程内存，
+        默认同时使用无头模式（无法手动登录，需要已登录的会话）
+        """
+        self.lean = lean
+        self.headless = lean if headless is None else headless
+        if lean:
+            apply_lean_options(self.chrome_options, headless=self.headless)
+        elif self.headless:
+            self.chrome_options.add_argument('--headless=new')
 
     def init_driver(self):
         """
@@ -42,63 +184,141 @@ class XiaohongshuScraper:
                 })
             '''
         })
-        driver.implicitly_wait(10)
+        # 不使用隐式等待，否则候选选择器每次未命中都要等待10秒；需要等待的地方使用显式等待
+        driver.implicitly_wait(0)
+        if self.lean:
+            block_resources(driver)
+        # 在打开页面前注入保存的登录会话
+        self.session_store.restore(driver)
+        return driver
+
+    def _checkout_driver(self):
+        """从 driver 池取出浏览器（没有池时新建），并为本次爬取开启网络捕获"""
+        if self.driver_pool is not None:
+            key = f"xiaohongshu:lean={self.lean}:headless={self.headless}:capture={self.capture_network}"
+            driver, reused = self.driver_pool.checkout(key, self.init_driver)
+            if reused:
+                print("复用已启动的浏览器")
+        else:
+            driver = self.init_driver()
+        self.capture = None
+        if self.capture_network:
+            try:
+                # 丢弃上一个任务遗留的网络事件
+                driver.get_log('performance')
+                self.capture = NetworkCapture(driver).enable()
+            except Exception as e:
+                print(f"无法开启网络捕获，改为解析页面: {e}")
         return driver
 
-    def scroll_page(self, driver):
+    def _release_driver(self, driver, pages, healthy):
+        """归还浏览器到 driver 池，没有池时直接关闭"""
+        if self.driver_pool is not None:
+            self.driver_pool.checkin(driver, pages=pages, healthy=healthy)
+        else:
+            driver.quit()
+
+    def _sort_by_time(self, driver):
+        """在搜索结果的筛选面板中选择"最新"，成功返回 True"""
+        try:
+            if self.capture is not None:
+                # 丢弃按综合排序加载的结果，之后捕获到的都是按最新排序的
+                self.capture.poll()
+            filter_button = WebDriverWait(driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, '.filter')))
+            ActionChains(driver).move_to_element(filter_button).perform()
+            latest = WebDriverWait(driver, 3).until(EC.element_to_be_clickable(
+                (By.XPATH, "//*[contains(@class, 'filter')]//span[text()='最新']")))
+            latest.click()
+            print("已切换为按最新排序")
+            time.sleep(2)  # 等待按最新排序的结果重新渲染
+            return True
+        except Exception as e:
+            print(f"无法切换为按最新排序，按综合排序爬取: {type(e).__name__}")
+            return False
+
+    def _ensure_login(self, driver):
         """
-        滚动页面加载更多内容
+        已注入（或复用浏览器中）的会话仍然有效时直接继续；否则等待手动登录并保存会话，
+        无头模式下无法手动登录，只给出提示
         """
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        while True:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(2, 4))
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+        if self.session_store.is_logged_in(driver):
+            print("\n已恢复登录会话，跳过手动登录")
+            return
+        if self.headless:
+            print("\n无头模式且没有可用的登录会话，以未登录状态继续")
+            return
+        print("\n请在打开的浏览器窗口中手动登录小红书...")
+        print("登录完成后，请按回车键继续...")
+        input()
+        try:
+            self.session_store.save(driver)
+        except Exception as e:
+            print(f"保存登录会话失败: {e}")
+
+    def scroll_page(self, driver, timeout=8):
+        """
+        滚动一次加载更多内容，新笔记卡片出现后立即返回，最多等待 timeout 秒
+        返回新加载的卡片数
+        """
+        try:
+            return scroll_for_more(driver, '.note-item', timeout=timeout)
+        except Exception as e:
+            print(f"滚动页面时出错: {e}")
+            return 0
 
     def parse_note(self, element):
         try:
             print("\n尝试解析笔记...")
             
-            # 获取标题
+            # 1. 先获取发布时间，不在日期范围内的卡片不再读取其他字段
             try:
-                title = element.find_element(By.CSS_SELECTOR, 'h3').text
-            except:
-                try:
-                    title = element.find_element(By.CSS_SELECTOR, '.title').text
-                except:
+                time_text = None
+                for selector in self.selectors.ordered('time', TIME_SELECTORS):
                     try:
-                        title = element.find_element(By.CSS_SELECTOR, '.content').text
+                        elements = element.find_elements(By.CSS_SELECTOR, selector)
+                        for elem in elements:
+                            text = elem.text
+                            print(f"可能的时间文本: {text}")
+                            # 检查文本是否包含时间相关信息
+                            if any(word in text for word in TIME_MARKERS):
+                                time_text = text
+                                break
+                        if time_text:
+                            self.selectors.promote('time', selector)
+                            break
                     except:
-                        try:
-                            # 尝试获取链接的文本
-                            title = element.find_element(By.CSS_SELECTOR, 'a').get_attribute('title')
-                        except:
-                            title = "未知标题"
+                        continue
+                
+                publish_date = self._parse_publish_date(time_text)
+                if publish_date is None:
+                    return None
+                print(f"最终发布时间: {publish_date}")
+                
+            except Exception as e:
+                print(f"处理时间信息时出错: {e}")
+                publish_date = datetime.now().strftime('%Y-%m-%d')
+
+            anchors = element.find_elements(By.CSS_SELECTOR, 'a')
+
+            # 获取标题
+            title = self.selectors.text(element, 'title', TITLE_SELECTORS)
+            if title is None:
+                # 尝试获取链接的文本
+                title = (anchors[0].get_attribute('title') if anchors else None) or "未知标题"
             print(f"找到标题: {title}")
 
             # 获取用户名
-            try:
-                user = element.find_element(By.CSS_SELECTOR, '.name').text
-            except:
-                try:
-                    user = element.find_element(By.CSS_SELECTOR, '.author').text
-                except:
-                    user = "未知用户"
+            user = self.selectors.text(element, 'user', USER_SELECTORS, default="未知用户")
             print(f"找到用户: {user}")
 
             # 获取笔记链接
-            try:
-                link = element.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-            except:
-                link = ""
+            link = anchors[0].get_attribute('href') if anchors else ""
 
-            # 1. 获取互动数据
+            # 2. 获取互动数据
             try:
                 # 获取所有数字元素
-                count_elements = element.find_elements(By.CSS_SELECTOR, '.count, .like, .comment, .collect')
+                count_elements = element.find_elements(By.CSS_SELECTOR, COUNT_SELECTOR)
                 
                 likes, comments, collects = 0, 0, 0
                 for elem in count_elements:
@@ -112,11 +332,11 @@ class XiaohongshuScraper:
                         print(f"互动元素: {text}, 父元素: {parent_html}")
                         
                         # 根据父元素HTML判断类型
-                        if any(word in parent_html for word in ['like', '点赞']):
+                        if any(word in parent_html for word in COUNT_KEYWORDS['likes']):
                             likes = self._convert_count(text)
-                        elif any(word in parent_html for word in ['comment', '评论']):
+                        elif any(word in parent_html for word in COUNT_KEYWORDS['comments']):
                             comments = self._convert_count(text)
-                        elif any(word in parent_html for word in ['collect', '收藏']):
+                        elif any(word in parent_html for word in COUNT_KEYWORDS['collects']):
                             collects = self._convert_count(text)
                     except Exception as e:
                         print(f"处理单个互动元素时出错: {e}")
@@ -128,74 +348,8 @@ class XiaohongshuScraper:
                 print(f"获取互动数据时出错: {e}")
                 likes, comments, collects = 0, 0, 0
 
-            # 2. 获取发布时间
-            try:
-                # 尝试多个可能的时间选择器
-                time_selectors = [
-                    '.time',
-                    '.date',
-                    '.publish-time',
-                    'time',
-                    '.desc time',
-                    '.desc',  # 可能在描述文本中包含时间
-                    '.content'  # 可能在内容中包含时间
-                ]
-                
-                time_text = None
-                for selector in time_selectors:
-                    try:
-                        elements = element.find_elements(By.CSS_SELECTOR, selector)
-                        for elem in elements:
-                            text = elem.text
-                            print(f"可能的时间文本: {text}")
-                            # 检查文本是否包含时间相关信息
-                            if any(word in text for word in ['年', '月', '日', '天前', '小时前']):
-                                time_text = text
-                                break
-                        if time_text:
-                            break
-                    except:
-                        continue
-                
-                if not time_text:
-                    print("未找到时间信息，使用当前时间")
-                    publish_date = datetime.now().strftime('%Y-%m-%d')
-                else:
-                    # 解析时间文本
-                    date = None
-                    if '年' in time_text and '月' in time_text:
-                        # 提取年月日
-                        match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})?日?', time_text)
-                        if match:
-                            year = int(match.group(1))
-                            month = int(match.group(2))
-                            day = int(match.group(3)) if match.group(3) else 1
-                            date = datetime(year, month, day)
-                    elif '天前' in time_text:
-                        days = int(re.search(r'(\d+)天前', time_text).group(1))
-                        date = datetime.now() - timedelta(days=days)
-                    elif '小时前' in time_text or '分钟前' in time_text:
-                        date = datetime.now()
-                    
-                    if date:
-                        # 检查日期范围
-                        start_date = datetime(2022, 7, 1)
-                        end_date = datetime(2023, 12, 31)
-                        if start_date <= date <= end_date:
-                            publish_date = date.strftime('%Y-%m-%d')
-                        else:
-                            print(f"日期 {date.strftime('%Y-%m-%d')} 不在目标范围内")
-                            return None
-                    else:
-                        publish_date = datetime.now().strftime('%Y-%m-%d')
-                    
-                print(f"最终发布时间: {publish_date}")
-                
-            except Exception as e:
-                print(f"处理时间信息时出错: {e}")
-                publish_date = datetime.now().strftime('%Y-%m-%d')
-
             return {
+                '笔记ID': note_id_from_link(link),
                 '标题': title,
                 '用户名': user,
                 '点赞数': likes,
@@ -208,6 +362,154 @@ class XiaohongshuScraper:
             print(f"解析笔记数据出错: {e}")
             return None
 
+    def _parse_publish_date(self, time_text):
+        """
+        解析发布时间文本（或接口返回的 datetime），返回 YYYY-MM-DD；
+        不在目标日期范围内时返回 None，没有时间信息时使用当前日期
+        """
+        if not time_text:
+            print("未找到时间信息，使用当前时间")
+            return datetime.now().strftime('%Y-%m-%d')
+
+        date = None
+        if isinstance(time_text, datetime):
+            date = time_text
+        elif re.search(r'\d{4}-\d{1,2}-\d{1,2}', time_text):
+            year, month, day = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', time_text).groups()
+            date = datetime(int(year), int(month), int(day))
+        elif re.fullmatch(r'\s*\d{1,2}-\d{1,2}\s*', time_text):
+            # 接口中近一年的笔记省略年份，补上当前年份后若落在未来则回退一年
+            month, day = (int(part) for part in time_text.strip().split('-'))
+            now = datetime.now()
+            year = now.year if (month, day) <= (now.month, now.day) else now.year - 1
+            date = datetime(year, month, day)
+        elif '年' in time_text and '月' in time_text:
+            # 提取年月日
+            match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})?日?', time_text)
+            if match:
+                year = int(match.group(1))
+                month = int(match.group(2))
+                day = int(match.group(3)) if match.group(3) else 1
+                date = datetime(year, month, day)
+        elif '天前' in time_text:
+            days = int(re.search(r'(\d+)天前', time_text).group(1))
+            date = datetime.now() - timedelta(days=days)
+        elif '小时前' in time_text or '分钟前' in time_text:
+            date = datetime.now()
+
+        if not date:
+            return datetime.now().strftime('%Y-%m-%d')
+        # 检查日期范围
+        if self.date_range.position(date) == 0:
+            return date.strftime('%Y-%m-%d')
+        print(f"日期 {date.strftime('%Y-%m-%d')} 不在目标范围内")
+        return None
+
+    def extract_notes(self, driver):
+        """
+        批量解析上次调用之后新加载的笔记：一次 execute_script 取回原始字段，
+        再在Python中转换计数和时间，返回解析成功且未出现过的笔记列表
+        """
+        raw_notes = driver.execute_script(EXTRACT_NOTES_JS, TITLE_SELECTORS, USER_SELECTORS,
+                                          COUNT_SELECTOR, COUNT_KEYWORDS, TIME_SELECTORS,
+                                          TIME_MARKERS)
+        notes = []
+        for raw in raw_notes:
+            note_id = note_id_from_link(raw.get('link'))
+            if not self._mark_seen(note_id or raw.get('link')):
+                continue
+            try:
+                publish_date = self._parse_publish_date(raw.get('time'))
+            except Exception as e:
+                print(f"处理时间信息时出错: {e}")
+                publish_date = datetime.now().strftime('%Y-%m-%d')
+            if publish_date is None:
+                continue
+            counts = raw.get('counts') or {}
+            notes.append({
+                '笔记ID': note_id,
+                '标题': raw.get('title') or "未知标题",
+                '用户名': raw.get('user') or "未知用户",
+                '点赞数': self._convert_count(counts.get('likes', '0')),
+                '评论数': self._convert_count(counts.get('comments', '0')),
+                '收藏数': self._convert_count(counts.get('collects', '0')),
+                '链接': raw.get('link') or "",
+                '发布时间': publish_date
+            })
+        return notes
+
+    def _mark_seen(self, key):
+        """记录笔记ID（或链接），已出现过时返回 False；没有可用标识的笔记不去重"""
+        if not key:
+            return True
+        if key in self.seen_note_ids:
+            return False
+        self.seen_note_ids.add(key)
+        return True
+
+    def capture_notes(self):
+        """
+        解析上次调用之后新捕获的搜索接口响应，按笔记ID去重；
+        返回 None 表示没有捕获到任何接口响应，需要解析页面
+        """
+        payloads = self.capture.poll()
+        if not payloads and not self.capture.responses:
+            return None
+        notes = []
+        for payload in payloads:
+            for record in parse_search_response(payload):
+                if not self._mark_seen(record['笔记ID']):
+                    continue
+                try:
+                    publish_date = self._parse_publish_date(record['发布时间'])
+                except Exception as e:
+                    print(f"处理时间信息时出错: {e}")
+                    publish_date = datetime.now().strftime('%Y-%m-%d')
+                if publish_date is None:
+                    continue
+                record['发布时间'] = publish_date
+                notes.append(record)
+        return notes
+
+    def _parse_notes(self, driver):
+        """
+        解析当前页面上新出现的笔记：优先使用捕获的接口响应，
+        没有捕获到响应时批量解析页面，批量解析失败时退回逐个元素解析；
+        各种方式都按笔记ID（没有时按链接）跳过已解析过的笔记
+        """
+        if self.capture is not None:
+            try:
+                notes = self.capture_notes()
+                if notes is not None:
+                    return notes
+                print("未捕获到搜索接口响应，改为解析页面")
+            except Exception as e:
+                print(f"解析接口响应失败，改为解析页面: {e}")
+        if self.batch_extract:
+            try:
+                return self.extract_notes(driver)
+            except Exception as e:
+                print(f"批量解析失败，改为逐个解析: {e}")
+                self.batch_extract = False
+        note_elements = driver.find_elements(By.CSS_SELECTOR, '.note-item')
+        print(f"\n当前页面找到 {len(note_elements)} 个笔记")
+        if len(note_elements) < self.parsed_elements:
+            # 卡片数变少说明列表被重新渲染，从头检查，已解析的笔记由 seen_note_ids 跳过
+            self.parsed_elements = 0
+        new_elements = note_elements[self.parsed_elements:]
+        self.parsed_elements = len(note_elements)
+        notes = []
+        for element in new_elements:
+            # 先只取链接判断是否解析过，已解析的卡片不再逐个字段读取
+            anchors = element.find_elements(By.CSS_SELECTOR, 'a')
+            link = anchors[0].get_attribute('href') if anchors else ""
+            if not self._mark_seen(note_id_from_link(link) or link):
+                continue
+            note = self.parse_note(element)
+            if note:
+                notes.append(note)
+        return notes
+
     def _convert_count(self, count_str):
         """
         转换计数字符串为数字
@@ -237,112 +539,142 @@ class XiaohongshuScraper:
             except Exception:
                 pass
 
-    def scrape_and_save(self, keyword, max_notes=100):
-        driver = self.init_driver()
+    def scrape_and_save(self, keyword, max_notes=100, segments=None):
+        """
+        爬取关键词下的笔记并返回笔记列表；
+        传入 segments 时记录只写入调用方的分段存储，由调用方负责合并，不再另存Excel
+        """
+        driver = self._checkout_driver()
         all_notes = []
-        save_counter = 0
+        self.seen_note_ids = set()
+        self.parsed_elements = 0
+        self.is_running = True
+        pages = 0
+        healthy = True
+        # 每50条数据追加写入一个新分段，只写新记录，结束时再合并为单个Excel
+        external_segments = segments is not None
+        if not external_segments:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            segments = SegmentSink(
+                os.path.join(self.data_path, "segments", f"xiaohongshu_{keyword}_{timestamp}"),
+                batch_size=50
+            )
         
         try:
             print("\n开始访问小红书...")
             print("提示：随时可以按 'p' 键暂停/继续爬取")
-            print("仅收集2022年7月至2023年12月的数据")
+            print(f"仅收集发布日期在 {self.date_range.describe()} 的数据")
             search_url = f"https://www.xiaohongshu.com/search?keyword={keyword}"
             driver.get(search_url)
-            
-            print("\n请在打开的浏览器窗口中手动登录小红书...")
-            print("登录完成后，请按回车键继续...")
-            input()
+            self._ensure_login(driver)
             
             print("\n继续执行爬取...")
             print(f"开始搜索关键词：{keyword}")
             
             # 确保保存目录存在
             os.makedirs(self.data_path, exist_ok=True)
+            # 等待搜索结果渲染，最多10秒
+            if not self.selectors.wait_for(driver, 'note_item', ['.note-item'], timeout=10):
+                print("10秒内未等到笔记卡片，继续尝试解析")
+            sorted_by_time = self.sort_by_time and self._sort_by_time(driver)
+            self.date_range.restart()
             
+            idle_scrolls = 0
+            max_idle_scrolls = 3  # 连续多次滚动都没有新内容，认为已到底部
             while len(all_notes) < max_notes and self.is_running:
                 if self.paused:
                     time.sleep(1)
                     continue
                 
-                note_elements = driver.find_elements(By.CSS_SELECTOR, '.note-item')
-                print(f"\n当前页面找到 {len(note_elements)} 个笔记")
+                page_notes = self._parse_notes(driver)[:max_notes - len(all_notes)]
+                pages += 1
+                print(f"\n本轮新解析出 {len(page_notes)} 个笔记")
+                if page_notes and self.detail_fetcher is not None:
+                    self.detail_fetcher.enrich(driver, page_notes)
                 
-                for element in note_elements:
+                for note_data in page_notes:
                     if len(all_notes) >= max_notes:
                         break
                         
-                    note_data = self.parse_note(element)
                     if note_data:  # 只有当解析成功时才添加数据
                         print("\n成功解析的数据:")
                         for key, value in note_data.items():
                             print(f"{key}: {value}")
                         
                         all_notes.append(note_data)
-                        save_counter += 1
                         print(f"成功解析第 {len(all_notes)} 个笔记")
                         
-                        # 每爬取3条数据就保存一次
-                        if save_counter >= 3:
-                            try:
-                                self._save_to_excel(all_notes, keyword)
-                                print(f"已保存 {len(all_notes)} 条数据")
-                                save_counter = 0
-                            except Exception as e:
-                                print(f"保存数据时出错: {e}")
+                        # 追加到分段存储，每满3条落盘一次
+                        try:
+                            segments.write(note_data)
+                        except Exception as e:
+                            print(f"保存数据时出错: {e}")
                 
-                # 滚动页面加载更多内容
-                self.scroll_page(driver)
-                time.sleep(random.uniform(2, 3))
+                # 按最新排序时判断信息流是否已越过开始日期；综合排序下只过滤不提前停止
+                counts = self.date_range.reset_counts()
+                if sorted_by_time and self.date_range.passed_start(counts):
+                    print(f"按最新排序已越过 {self.date_range.describe()} 的开始日期，停止爬取")
+                    break
+                
+                # 滚动页面加载更多内容，新内容出现后稍作停顿即开始解析
+                if self.scroll_page(driver):
+                    idle_scrolls = 0
+                    time.sleep(random.uniform(0.5, 1))
+                else:
+                    idle_scrolls += 1
+                    print(f"滚动后没有新笔记 ({idle_scrolls}/{max_idle_scrolls})")
+                    if idle_scrolls >= max_idle_scrolls:
+                        print("已到达页面底部")
+                        break
         
         except Exception as e:
             print(f"爬取过程出错: {e}")
+            healthy = False
         
         finally:
             self.is_running = False
-            driver.quit()
+            self._release_driver(driver, pages, healthy)
             
-            # 最后保存一次
-            if all_notes:
+            # 最后把所有分段合并为一个文件
+            if external_segments:
+                segments.flush()
+                print(f"\n程序结束，共采集 {len(all_notes)} 条数据")
+            elif all_notes:
                 try:
-                    self._save_to_excel(all_notes, keyword)
+                    segments.flush()
+                    self._save_to_excel(segments, keyword)
                     print(f"\n程序结束，共保存 {len(all_notes)} 条数据")
                 except Exception as e:
                     print(f"最终保存数据时出错: {e}")
             else:
                 print("警告：没有收集到任何数据")
+                segments.discard()
             
             return all_notes
 
-    def _save_to_excel(self, notes, keyword):
+    def _save_to_excel(self, segments, keyword):
         """
-        保存数据到Excel
+        把分段存储合并为一个Excel文件，合并成功后删除分段
         """
-        if not notes:
+        if not segments.segments:
             print("没有数据需要保存")
             return
         
+        # 生成文件名
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = os.path.join(self.data_path, f"xiaohongshu_{keyword}_{timestamp}.xlsx")
+        
         try:
-            # 创建DataFrame
-            df = pd.DataFrame(notes)
-            
-            # 生成文件名
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = os.path.join(self.data_path, f"xiaohongshu_{keyword}_{timestamp}.xlsx")
-            
-            # 保存为Excel
-            df.to_excel(filename, index=False, engine='openpyxl')
+            # 流式合并为Excel
+            count = segments.compact(filename)
             print(f"\n数据已保存到: {filename}")
-            print(f"保存的数据条数: {len(df)}")
-            
-            # 打印保存的数据概要
-            print("\n数据概要:")
-            print(f"总条数: {len(df)}")
-            print(f"包含的字段: {', '.join(df.columns)}")
+            print(f"保存的数据条数: {count}")
             
             # 验证文件是否成功创建
             if os.path.exists(filename):
                 file_size = os.path.getsize(filename)
                 print(f"文件大小: {file_size/1024:.2f} KB")
+                segments.discard()
             else:
                 print("警告：文件似乎未成功创建")
             
@@ -352,10 +684,11 @@ class XiaohongshuScraper:
             # 尝试保存为CSV作为备选
             try:
                 csv_filename = filename.replace('.xlsx', '.csv')
-                df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
+                segments.compact(csv_filename)
                 print(f"已保存为CSV格式: {csv_filename}")
+                segments.discard()
             except Exception as csv_e:
-                print(f"保存CSV也失败: {csv_e}")
+                print(f"保存CSV也失败: {csv_e}，分段数据保留在: {segments.directory}")
 
     def analyze_data(self, df):
         """
@@ -0,0 +1,39 @@
+import json
+import os
+
+import pytest
+
+from scrapers.identity_pool import IdentityPool
+from scrapers.mock_weibo_server import MockWeiboServer
+from scrapers.weibo_scraper_full import WeiboScraper
+
+
+@pytest.fixture
+def mock_weibo():
+    """6 页、每页 10 条微博的模拟接口，无延迟"""
+    with MockWeiboServer(total_pages=6, latency=0) as server:
+        yield server
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch, mock_weibo):
+    """创建指向模拟接口的 WeiboScraper，所有文件都写在临时目录中"""
+    monkeypatch.chdir(tmp_path)
+    # 预先写好身份池缓存，跳过 fake_useragent 生成
+    identities = os.path.join(tmp_path, "identities.json")
+    with open(identities, 'w', encoding='utf-8') as f:
+        json.dump([{'User-Agent': 'pytest', 'Accept-Language': 'zh-CN', 'Referer': 'https://m.weibo.cn/'}], f)
+
+    def make(**kwargs):
+        kwargs.setdefault('pages_per_minute', 60000)
+        kwargs.setdefault('max_pages_per_minute', 60000)
+        kwargs.setdefault('burst', 10)
+        kwargs.setdefault('expand_long_text', False)
+        kwargs.setdefault('identity_pool', IdentityPool(path=identities))
+        scraper = WeiboScraper(**kwargs)
+        scraper.search_url = f"{mock_weibo.url}/api/container/getIndex"
+        scraper.long_text_url = f"{mock_weibo.url}/statuses/extend"
+        scraper.rate_controller.next_delay = lambda: 0
+        return scraper
+
+    return make
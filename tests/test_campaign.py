@@ -0,0 +1,100 @@
+import os
+from collections import Counter
+
+from scrapers import campaign
+from scrapers.sinks import iter_segment_records
+
+
+class FakeSessionStore:
+    path = "session.json"
+
+    def load(self):
+        return {'cookies': []}
+
+
+class FakeBrowserScraper:
+    """记录写入调用方给的分段；没有分段时模拟旧行为另存自己的文件"""
+    def __init__(self, data_path):
+        self.session_store = FakeSessionStore()
+        self.data_path = data_path
+
+    def scrape_and_save(self, keyword, segments=None):
+        notes = [{'笔记ID': str(i), '标题': f"{keyword}{i}"} for i in range(3)]
+        if segments is None:
+            os.makedirs(self.data_path, exist_ok=True)
+            open(os.path.join(self.data_path, f"{keyword}.xlsx"), 'w').close()
+        else:
+            for note in notes:
+                segments.write(note)
+        return notes
+
+
+def test_browser_job_has_a_single_writer(tmp_path, monkeypatch):
+    data_path = os.path.join(tmp_path, "data")
+    monkeypatch.setattr(campaign, '_create_scraper',
+                        lambda platform, options: FakeBrowserScraper(data_path))
+    segment_dir = os.path.join(tmp_path, "segments", "xiaohongshu_test")
+
+    summary = campaign.run_job('xiaohongshu', 'test', segment_dir, {})
+
+    assert summary['状态'] == '成功'
+    assert summary['记录数'] == 3
+    assert [r['笔记ID'] for r in iter_segment_records(segment_dir)] == ['0', '1', '2']
+    assert not os.path.exists(data_path)
+
+
+class FakeFuture:
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+
+    def result(self):
+        return self.fn(*self.args)
+
+
+class FakeExecutor:
+    """不启动进程，任务在 wait 时才依次完成"""
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        return FakeFuture(fn, args)
+
+
+def test_campaign_respects_platform_limits_and_splits_weibo_rate(tmp_path, monkeypatch):
+    jobs = []
+    peaks = Counter()
+
+    def fake_run_job(platform, keyword, segment_dir, options):
+        jobs.append((platform, keyword, options))
+        return {'平台': platform, '关键词': keyword, '记录数': 0, '状态': '失败',
+                '错误': '', '耗时(秒)': 0.0, '分段目录': segment_dir}
+
+    def fake_wait(running, return_when):
+        active = Counter(future.args[0] for future in running)
+        for platform, count in active.items():
+            peaks[platform] = max(peaks[platform], count)
+        # 每次只完成最早提交的一个任务
+        return {next(iter(running))}, set()
+
+    monkeypatch.setattr(campaign, 'ProcessPoolExecutor', FakeExecutor)
+    monkeypatch.setattr(campaign, 'wait', fake_wait)
+    monkeypatch.setattr(campaign, 'run_job', fake_run_job)
+
+    summary = campaign.run_campaign(['a', 'b', 'c'], platforms=('weibo', 'xiaohongshu'),
+                                    platform_limits={'weibo': 2}, max_workers=4,
+                                    output_dir=str(tmp_path), weibo_pages_per_minute=40, max_pages=5)
+
+    assert len(summary) == len(jobs) == 6
+    assert peaks == {'weibo': 2, 'xiaohongshu': 1}
+    options = jobs[0][2]
+    assert options['max_pages'] == 5
+    # 合计 40 页/分钟平分给同时运行的 2 个微博任务
+    assert options['weibo_rate'] == {'pages_per_minute': 20, 'min_pages_per_minute': 3,
+                                     'max_pages_per_minute': 20}
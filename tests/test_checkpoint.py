@@ -0,0 +1,55 @@
+import os
+
+from scrapers.checkpoint import CrawlCheckpoint, MemoryCheckpoint
+
+
+def _records(*ids):
+    return [{'微博ID': str(i)} for i in ids]
+
+
+def test_last_page_only_advances_over_contiguous_pages(tmp_path):
+    checkpoint = CrawlCheckpoint(os.path.join(tmp_path, "cp.json"), '测试')
+    checkpoint.mark_page(1, _records(1))
+    checkpoint.mark_page(3, _records(3))
+    assert checkpoint.last_page == 1
+    assert checkpoint.is_page_done(3) and not checkpoint.is_page_done(2)
+    checkpoint.mark_page(2, _records(2))
+    assert checkpoint.last_page == 3
+    assert not checkpoint.completed_pages
+
+
+def test_failed_page_is_retried_on_resume(tmp_path):
+    path = os.path.join(tmp_path, "cp.json")
+    checkpoint = CrawlCheckpoint(path, '测试')
+    checkpoint.mark_page(1, _records(1, 2))
+    checkpoint.mark_failed(2)
+    # 第2页之后的页完成也不会越过失败页
+    checkpoint.mark_page(3, _records(2, 3))
+    checkpoint.save()
+
+    loaded = CrawlCheckpoint.load(path)
+    assert loaded.keyword == '测试'
+    assert loaded.last_page == 1
+    assert not loaded.is_page_done(2) and loaded.is_page_done(3)
+    assert [r['微博ID'] for r in loaded.iter_records()] == ['1', '2', '3']
+
+    loaded.clear()
+    assert CrawlCheckpoint.load(path) is None
+    assert not os.path.exists(loaded.records_path)
+
+
+def test_torn_record_line_is_skipped(tmp_path):
+    checkpoint = CrawlCheckpoint(os.path.join(tmp_path, "cp.json"), '测试')
+    checkpoint.mark_page(1, _records(1))
+    with open(checkpoint.records_path, 'a', encoding='utf-8') as f:
+        f.write('{"微博ID": "2"')
+    assert [r['微博ID'] for r in checkpoint.iter_records()] == ['1']
+
+
+def test_memory_checkpoint_dedups_without_files():
+    checkpoint = MemoryCheckpoint()
+    assert len(checkpoint.mark_page(1, _records(1, 2))) == 2
+    checkpoint.mark_failed(2)
+    assert checkpoint.mark_page(2, _records(2, 3)) == _records(3)
+    assert not checkpoint.failed_pages
+    assert list(checkpoint.iter_records()) == []
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from scrapers.date_range import DateRange
+
+
+def _feed(date_range, dates):
+    for date in dates:
+        date_range.position(datetime.strptime(date, '%Y-%m-%d'))
+    return date_range.reset_counts()
+
+
+def test_position_counts_each_side_and_includes_end_day():
+    date_range = DateRange('2024-01-01', '2024-01-31')
+    assert date_range.position(datetime(2023, 12, 31)) == -1
+    assert date_range.position(datetime(2024, 1, 31, 23, 59)) == 0
+    assert date_range.position(datetime(2024, 2, 1)) == 1
+    assert date_range.reset_counts() == {-1: 1, 0: 1, 1: 1}
+    assert not date_range.counts
+
+
+def test_a_few_older_cards_do_not_stop_the_crawl():
+    # 置顶或推广的旧内容夹在范围内的内容之间
+    date_range = DateRange('2024-01-01', stop_after=3)
+    counts = _feed(date_range, ['2024-01-20', '2023-06-01', '2023-05-01', '2024-01-19'])
+    assert not date_range.passed_start(counts)
+
+
+def test_consecutive_older_cards_stop():
+    date_range = DateRange('2024-01-01', stop_after=3)
+    counts = _feed(date_range, ['2024-01-05', '2023-12-31', '2023-12-30'])
+    assert not date_range.passed_start(counts)
+    counts = _feed(date_range, ['2024-01-02', '2023-12-29', '2023-12-28', '2023-12-27'])
+    assert counts[0] and date_range.passed_start(counts)
+
+
+def test_round_without_matches_stops():
+    date_range = DateRange('2024-01-01', '2024-01-31', stop_after=10)
+    counts = _feed(date_range, ['2024-03-01', '2023-12-01'])
+    assert date_range.passed_start(counts)
+    date_range.restart()
+    counts = _feed(date_range, ['2024-03-01', '2024-02-15'])
+    assert not date_range.passed_start(counts)
+    assert date_range.consecutive_before == 0
+
+
+def test_douyin_publish_time_picks_smallest_covering_window():
+    now = datetime(2024, 3, 10, 12)
+    assert DateRange().douyin_publish_time(now) == 0
+    assert DateRange('2024-03-10').douyin_publish_time(now) == 1
+    assert DateRange('2024-03-04').douyin_publish_time(now) == 7
+    assert DateRange('2024-01-01').douyin_publish_time(now) == 182
+    assert DateRange('2023-01-01').douyin_publish_time(now) == 0
+
+
+def test_start_after_end_is_rejected():
+    with pytest.raises(ValueError):
+        DateRange('2024-02-01', '2024-01-01')
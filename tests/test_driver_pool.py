@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapers.driver_pool import DriverPool, get_default_driver_pool
+
+
+class FakeDriver:
+    def __init__(self, marker_dir=None):
+        self.marker_dir = marker_dir
+        self.quit_called = False
+
+    def execute_script(self, script):
+        return 0 if 'performance' in script else 1
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+        if self.marker_dir:
+            open(os.path.join(self.marker_dir, f"quit_{os.getpid()}"), 'w').close()
+
+
+def test_checkin_reuses_and_recycles_after_max_pages():
+    pool = DriverPool(size=1, max_pages=10)
+    driver, reused = pool.checkout('k', FakeDriver)
+    assert not reused
+    pool.checkin(driver, pages=5)
+    again, reused = pool.checkout('k', FakeDriver)
+    assert again is driver and reused
+    pool.checkin(again, pages=5)
+    assert driver.quit_called
+    assert pool.stats()['回收'] == 1
+
+
+def test_close_quits_idle_drivers():
+    pool = DriverPool(size=2)
+    driver, _ = pool.checkout('k', FakeDriver)
+    pool.checkin(driver)
+    pool.close()
+    assert driver.quit_called
+
+
+def _use_default_pool(marker_dir):
+    pool = get_default_driver_pool()
+    driver, _ = pool.checkout('k', lambda: FakeDriver(marker_dir))
+    pool.checkin(driver)
+    return os.getpid()
+
+
+def test_default_pool_is_closed_when_pool_worker_exits(tmp_path):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        pid = executor.submit(_use_default_pool, str(tmp_path)).result()
+    assert os.path.exists(os.path.join(tmp_path, f"quit_{pid}"))
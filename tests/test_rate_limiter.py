@@ -0,0 +1,69 @@
+import pytest
+
+from scrapers import rate_limiter
+from scrapers.rate_limiter import TokenBucket, AIMDController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_queues(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket._reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 令牌不足时按先后顺序排队：第4、5个请求分别等待 0.5 秒和 1 秒
+    assert bucket._reserve() == pytest.approx(0.5)
+    assert bucket._reserve() == pytest.approx(1.0)
+    clock.now += 10
+    assert bucket._reserve() == 0.0
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_aimd_increases_and_clamps(clock):
+    controller = AIMDController(initial_rate=1.0, max_rate=1.05, increase=0.02)
+    for _ in range(5):
+        controller.record_success()
+    assert controller.rate == 1.05
+    assert controller.error_ratio == 0.0
+
+
+def test_aimd_decreases_once_per_cooldown_and_syncs_bucket(clock):
+    bucket = TokenBucket(rate=1)
+    controller = AIMDController(initial_rate=1.0, min_rate=0.3, bucket=bucket)
+    controller.record_failure("429")
+    controller.record_failure("429")  # 同一冷却期内的在途请求
+    assert controller.rate == 0.5
+    assert bucket.rate == 0.5
+    clock.now += 10
+    controller.record_failure("429")
+    assert controller.rate == 0.3  # 不低于 min_rate
+    assert controller.error_ratio == 1.0
+
+
+def test_aimd_state_round_trip(clock):
+    controller = AIMDController(initial_rate=1.0, max_rate=2.0)
+    controller.record_success()
+    controller.record_failure("418")
+    restored = AIMDController(initial_rate=0.1, max_rate=2.0)
+    restored.load_state(controller.state())
+    assert restored.rate == controller.rate
+    assert restored.error_ratio == 0.5
+    # 恢复的速率仍受新的上下限约束
+    capped = AIMDController(initial_rate=0.1, max_rate=0.2)
+    capped.load_state({'rate': 1.5})
+    assert capped.rate == 0.2
@@ -0,0 +1,43 @@
+import os
+
+from scrapers.response_cache import ResponseCache
+
+
+def test_put_and_get_ignore_param_order(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://x", {'a': 1, 'b': 2}, {'ok': 1})
+    assert cache.get("http://x", {'b': 2, 'a': 1}) == {'ok': 1}
+    assert cache.get("http://x", {'a': 2}) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entry_is_removed(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://x", None, {'ok': 1}, ttl=-1)
+    assert cache.get("http://x") is None
+    assert cache.stats()['size_mb'] == 0
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://x", None, {'ok': 1})
+    with open(cache._path(cache.make_key("http://x")), 'wb') as f:
+        f.write(b'not gzip')
+    assert cache.get("http://x") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for i in range(3):
+        cache.put(f"http://x/{i}", None, {'body': 'x' * 100})
+        path = cache._path(cache.make_key(f"http://x/{i}"))
+        os.utime(path, (1000 + i, 1000 + i))
+    # 命中会刷新使用时间，最久未用的变成第2条
+    assert cache.get("http://x/0") is not None
+    entry_size = os.path.getsize(path)
+    cache.max_bytes = entry_size * 3.5
+    cache.put("http://x/3", None, {'body': 'x' * 100})
+
+    assert cache.get("http://x/1") is None
+    assert all(cache.get(f"http://x/{i}") is not None for i in (0, 2, 3))
+    assert cache._total_bytes <= cache.max_bytes
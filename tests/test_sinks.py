@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+
+from scrapers.sinks import SegmentSink, CsvSink, TransformSink, iter_segment_records, read_manifest
+
+
+def test_segments_append_and_compact(tmp_path):
+    directory = os.path.join(tmp_path, "segments")
+    sink = SegmentSink(directory, batch_size=2)
+    for i in range(5):
+        sink.write({'id': i})
+    sink.flush()
+    assert [segment['rows'] for segment in read_manifest(directory)] == [2, 2, 1]
+
+    # 重新打开时在已有分段之后继续追加
+    reopened = SegmentSink(directory, batch_size=2)
+    reopened.write({'id': 5})
+    reopened.flush()
+    assert [r['id'] for r in iter_segment_records(directory)] == list(range(6))
+
+    path = os.path.join(tmp_path, "merged.csv")
+    assert reopened.compact(path) == 6
+    assert list(pd.read_csv(path)['id']) == list(range(6))
+
+
+def test_manifest_is_append_only_and_skips_torn_line(tmp_path):
+    directory = os.path.join(tmp_path, "segments")
+    sink = SegmentSink(directory, batch_size=1)
+    sink.write({'id': 1})
+    manifest = os.path.join(directory, "manifest.jsonl")
+    with open(manifest, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+    sink.write({'id': 2})
+    with open(manifest, 'r', encoding='utf-8') as f:
+        assert f.readline() == first_line
+    with open(manifest, 'a', encoding='utf-8') as f:
+        f.write('{"file": "part-')
+    assert len(read_manifest(directory)) == 2
+
+
+def test_transform_sink_applies_transforms_per_batch(tmp_path):
+    path = os.path.join(tmp_path, "out.csv")
+
+    def double(df):
+        df['y'] = df['x'] * 2
+        return df
+
+    with TransformSink([CsvSink(path)], [double], batch_size=2) as sink:
+        for x in range(3):
+            sink.write({'x': x})
+    assert list(pd.read_csv(path)['y']) == [0, 2, 4]
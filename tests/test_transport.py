@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import requests
+
+from scrapers.transport import HttpTransport, RetryBudget
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        status = self.statuses.pop(0) if self.statuses else 500
+        if status is None:
+            raise requests.ConnectionError("断开")
+        return FakeResponse(status)
+
+
+def _transport(statuses, budget=None, max_retries=3):
+    transport = HttpTransport(max_retries=max_retries, backoff_base=0, retry_budget=budget)
+    transport.session = FakeSession(statuses)
+    return transport
+
+
+def test_retries_until_success():
+    transport = _transport([503, None, 200])
+    attempts = []
+    response = transport.get("http://x", on_attempt=lambda r, e: attempts.append((r, e)))
+    assert response.status_code == 200
+    assert len(attempts) == 3
+    assert transport.retry_budget.requests == 1
+
+
+def test_non_retryable_status_is_returned_immediately():
+    transport = _transport([404])
+    assert transport.get("http://x").status_code == 404
+    assert transport.session.calls == 1
+
+
+def test_retry_budget_caps_retry_ratio_under_sustained_failure():
+    budget = RetryBudget(ratio=0.2, min_retries=2)
+    transport = _transport([], budget=budget)
+    for _ in range(50):
+        assert transport.get("http://x").status_code == 500
+    assert budget.requests == 50
+    assert budget.retries <= 2 + 0.2 * 50
+
+
+def test_retry_after_seconds_and_http_date():
+    transport = HttpTransport()
+    assert transport._retry_after(FakeResponse(429, {'Retry-After': '7'})) == 7.0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= transport._retry_after(FakeResponse(429, {'Retry-After': later})) <= 30
+    assert transport._retry_after(FakeResponse(429, {'Retry-After': 'soon'})) is None
+    assert transport._retry_after(FakeResponse(429)) is None
+    # Retry-After 优先于指数退避，但有上限
+    assert transport._backoff(0, FakeResponse(429, {'Retry-After': '100000'})) == transport.backoff_max * 5
+
+
+def test_budget_grows_with_requests():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
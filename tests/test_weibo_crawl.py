@@ -0,0 +1,18 @@
+import os
+
+from scrapers.sinks import CsvSink
+
+
+def test_default_return_is_record_count(make_scraper, tmp_path):
+    scraper = make_scraper()
+    path = os.path.join(tmp_path, "out.csv")
+    assert scraper.scrape_and_save("kw", sinks=[CsvSink(path)]) == 60
+
+
+def test_return_df_reads_output_back(make_scraper, tmp_path):
+    scraper = make_scraper()
+    df = scraper.scrape_and_save("kw", concurrency=3, return_df=True,
+                                 sinks=[CsvSink(os.path.join(tmp_path, "out.csv"))])
+    assert len(df) == 60
+    assert df['微博ID'].is_unique
+    assert str(df['标准发布时间'].dt.tz) == 'Asia/Shanghai'
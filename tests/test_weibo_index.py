@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from scrapers.weibo_index import WeiboIdIndex, weibo_fingerprint
+
+
+def _record(weibo_id, content='正文', likes=1):
+    return {'微博ID': weibo_id, '内容': content, '转发数': 0, '评论数': 0, '点赞数': likes}
+
+
+def test_fingerprint_ignores_float_counts_and_missing_values():
+    # 从CSV读回的计数是浮点数，缺失值是 NaN
+    assert weibo_fingerprint(_record('1', likes=3)) == weibo_fingerprint(_record('1', likes=3.0))
+    assert weibo_fingerprint({'内容': None}) == weibo_fingerprint({'内容': float('nan')})
+    assert weibo_fingerprint(_record('1')) != weibo_fingerprint(_record('1', content='改过'))
+
+
+def test_filter_new_keeps_new_and_changed(tmp_path):
+    index = WeiboIdIndex('测试', str(tmp_path))
+    index.update([_record('1'), _record('2'), {'微博ID': None}])
+    assert sorted(index.fingerprints) == ['1', '2']
+    records = [_record('1'), _record('2', likes=9), _record('3')]
+    assert [r['微博ID'] for r in index.filter_new(records)] == ['2', '3']
+    assert index.known_ratio(records) == 2 / 3
+
+
+def test_save_and_load(tmp_path):
+    index = WeiboIdIndex('测试', str(tmp_path))
+    index.update([_record(1)])
+    index.save()
+    loaded = WeiboIdIndex.load('测试', str(tmp_path))
+    assert 1 in loaded and '1' in loaded
+
+
+def test_build_from_outputs_prefers_csv(tmp_path):
+    data_path = str(tmp_path)
+    pd.DataFrame([_record('1'), _record('2')]).to_csv(
+        os.path.join(data_path, "weibo_测试_20240101.csv"), index=False)
+    # 同名的xlsx不再读取；其他关键词的输出不受影响
+    open(os.path.join(data_path, "weibo_测试_20240101.xlsx"), 'w').close()
+    pd.DataFrame([_record('9')]).to_csv(os.path.join(data_path, "weibo_其他_20240101.csv"), index=False)
+
+    index = WeiboIdIndex.load('测试', data_path)
+    assert sorted(index.fingerprints) == ['1', '2']
+    assert not index.filter_new([_record('1')])
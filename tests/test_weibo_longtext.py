@@ -0,0 +1,32 @@
+import pandas as pd
+
+from scrapers.weibo_longtext import LongTextExpander
+
+
+def _batch(ids):
+    return pd.DataFrame({'微博ID': ids, '内容': [f"截断{i}" for i in ids], '长文本': [True] * len(ids)})
+
+
+def test_expand_writes_full_text_column_and_keeps_source():
+    expander = LongTextExpander(lambda weibo_id: None if weibo_id == '2' else f"全文{weibo_id}")
+    df = expander.expand(_batch(['1', '2']))
+    assert list(df['内容']) == ['截断1', '截断2']
+    assert list(df['全文']) == ['全文1', '截断2']
+    assert expander.stats()['failed'] == 1
+
+
+def test_cache_is_shared_across_batches_and_bounded():
+    fetched = []
+
+    def fetch(weibo_id):
+        fetched.append(weibo_id)
+        return f"全文{weibo_id}"
+
+    expander = LongTextExpander(fetch, cache_size=2)
+    expander.expand(_batch(['1', '2']))
+    expander.expand(_batch(['1', '2', '1']))
+    assert sorted(fetched) == ['1', '2']
+    expander.expand(_batch(['3']))
+    expander.expand(_batch(['1']))
+    assert fetched.count('1') == 2
+    assert len(expander._texts) == 2
@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from scrapers.sinks import CsvSink
+from scrapers.weibo_index import WeiboIdIndex
+
+
+class CrawlCrashed(Exception):
+    pass
+
+
+def _crash_after(scraper, last_page):
+    """处理完 last_page 之后的第一条记录时抛出异常，模拟爬取中途崩溃"""
+    iter_page_records = scraper._iter_page_records
+
+    def crashing(*args, **kwargs):
+        for page, record in iter_page_records(*args, **kwargs):
+            if page > last_page:
+                raise CrawlCrashed()
+            yield page, record
+
+    scraper._iter_page_records = crashing
+
+
+def _ids(path):
+    return set(pd.read_csv(path, dtype={'微博ID': str})['微博ID'])
+
+
+@pytest.mark.parametrize('concurrency', [None, 3])
+def test_resume_after_crash_outputs_every_post_once(make_scraper, tmp_path, concurrency):
+    scraper = make_scraper()
+    _crash_after(scraper, 3)
+    with pytest.raises(CrawlCrashed):
+        scraper.scrape_and_save("kw", concurrency=concurrency, return_df=False,
+                                sinks=[CsvSink(os.path.join(tmp_path, "crashed.csv"))])
+    assert os.path.exists(scraper._checkpoint_file("kw"))
+
+    scraper = make_scraper()
+    path = os.path.join(tmp_path, "resumed.csv")
+    scraper.resume("kw", concurrency=concurrency, return_df=False, sinks=[CsvSink(path)])
+    ids = _ids(path)
+    assert len(ids) == 60
+    assert not os.path.exists(scraper._checkpoint_file("kw"))
+
+
+def test_incremental_resume_indexes_replayed_records(make_scraper, tmp_path):
+    out = os.path.join(tmp_path, "out")
+    scraper = make_scraper()
+    _crash_after(scraper, 3)
+    with pytest.raises(CrawlCrashed):
+        scraper.scrape_and_save("kw", incremental=True, return_df=False,
+                                sinks=[CsvSink(os.path.join(out, "crashed.csv"))])
+
+    scraper = make_scraper()
+    scraper.resume("kw", incremental=True, return_df=False,
+                   sinks=[CsvSink(os.path.join(out, "resumed.csv"))])
+    index = WeiboIdIndex.load("kw", scraper.data_path)
+    assert len(index.fingerprints) == 60
+
+    # 下一次增量爬取不应再输出崩溃前已爬到的微博
+    scraper = make_scraper()
+    path = os.path.join(out, "next.csv")
+    scraper.scrape_and_save("kw", incremental=True, return_df=False, sinks=[CsvSink(path)])
+    assert not os.path.exists(path) or not _ids(path)
@@ -0,0 +1,37 @@
+import logging
+import os
+
+import pandas as pd
+
+from scrapers.sinks import CsvSink
+from scrapers.weibo_shards import sub_query_shards
+
+
+def test_sub_query_shards_include_keyword():
+    assert sub_query_shards("冰雪", ["门票", "攻略"]) == ["冰雪", "冰雪 门票", "冰雪 攻略"]
+
+
+def test_sharded_crawl_deduplicates_by_id(make_scraper, tmp_path):
+    # 模拟接口的微博ID只与页码有关，各分片返回的是同一批微博
+    scraper = make_scraper()
+    path = os.path.join(tmp_path, "out.csv")
+    scraper.scrape_and_save("kw", shards=sub_query_shards("kw", ["a", "b"]), concurrency=2,
+                            return_df=False, sinks=[CsvSink(path)])
+    ids = pd.read_csv(path, dtype={'微博ID': str})['微博ID']
+    assert len(ids) == 60
+    assert ids.is_unique
+
+
+def test_failed_shard_pages_are_reported(make_scraper, tmp_path, caplog):
+    scraper = make_scraper()
+    request_page = scraper._request_page
+
+    def flaky(keyword, page):
+        return None if (keyword, page) == ("kw a", 2) else request_page(keyword, page)
+
+    scraper._request_page = flaky
+    with caplog.at_level(logging.WARNING):
+        scraper.scrape_and_save("kw", shards=["kw a"], concurrency=2, return_df=False,
+                                sinks=[CsvSink(os.path.join(tmp_path, "out.csv"))])
+    assert any("分片 kw a 的第 [2] 页请求失败" in message for message in caplog.messages)
+    assert any("{'kw a': [2]}" in message for message in caplog.messages)
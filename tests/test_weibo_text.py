@@ -0,0 +1,50 @@
+import pandas as pd
+
+from scrapers.weibo_text import clean_weibo_html, add_clean_text
+
+
+def test_strip_tags_emoji_and_fulltext_link():
+    html = ('今天去了<a href="/n/张三">@张三</a> 的店'
+            '<img alt="[哈哈]" src="x.png"><br />'
+            '<a href="/status/123">全文</a>')
+    cleaned = clean_weibo_html([html])
+    assert cleaned['纯文本'][0] == '今天去了@张三 的店[哈哈]'
+    assert cleaned['提及'][0] == '张三'
+
+
+def test_rows_stay_aligned_when_text_contains_bare_angle_bracket():
+    cleaned = clean_weibo_html(['a < b', '<a href="x">c</a>', 'd'])
+    assert list(cleaned['纯文本']) == ['a < b', 'c', 'd']
+
+
+def test_separator_inside_text_does_not_shift_rows():
+    cleaned = clean_weibo_html(['x\x00<b>y</b>', 'z'])
+    assert list(cleaned['纯文本']) == ['xy', 'z']
+
+
+def test_duplicates_and_missing_values():
+    values = pd.Series(['<b>同一条</b>', None, '<b>同一条</b>'], index=[10, 11, 12])
+    cleaned = clean_weibo_html(values)
+    assert list(cleaned.index) == [10, 11, 12]
+    assert list(cleaned['纯文本']) == ['同一条', '', '同一条']
+
+
+def test_hashtags_and_external_links():
+    html = ('<a href="https://m.weibo.cn/search?containerid=1">#冰雪大世界#</a>'
+            '<a data-url="http://t.cn/abc" href="https://m.weibo.cn/p/index">网页链接</a>')
+    cleaned = clean_weibo_html([html])
+    assert cleaned['话题'][0] == '冰雪大世界'
+    assert cleaned['链接'][0] == 'http://t.cn/abc'
+
+
+def test_add_clean_text_keeps_source_columns():
+    df = pd.DataFrame({'内容': ['<b>正文</b>'], '原微博内容': ['']})
+    add_clean_text(df)
+    assert df['内容'][0] == '<b>正文</b>'
+    assert df['纯文本'][0] == '正文'
+    assert df['原微博纯文本'][0] == ''
+
+
+def test_email_addresses_are_not_mentions():
+    cleaned = clean_weibo_html(['联系 a@b.com 或 first.last@example.cn，转发给@李四 和 @王五'])
+    assert cleaned['提及'][0] == '李四,王五'
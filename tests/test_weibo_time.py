@@ -0,0 +1,63 @@
+import pandas as pd
+
+from scrapers.weibo_time import normalize_created_at, add_normalized_time
+
+CRAWL_TIME = pd.Timestamp('2024-03-10 15:00:00')
+
+
+def _normalize(values, crawl_time=CRAWL_TIME):
+    return normalize_created_at(values, crawl_time=crawl_time)
+
+
+def _local(text):
+    return pd.Timestamp(text, tz='Asia/Shanghai')
+
+
+def test_relative_times():
+    result = _normalize(['刚刚', '5分钟前', '3小时前', '2天前'])
+    assert list(result) == [_local('2024-03-10 15:00'), _local('2024-03-10 14:55'),
+                            _local('2024-03-10 12:00'), _local('2024-03-08 15:00')]
+
+
+def test_day_words():
+    result = _normalize(['今天 08:30', '昨天 12:30', '前天 23:05'])
+    assert list(result) == [_local('2024-03-10 08:30'), _local('2024-03-09 12:30'),
+                            _local('2024-03-08 23:05')]
+
+
+def test_dates_without_year_roll_back_when_in_future():
+    result = _normalize(['02-15', '12-31', '2023-12-31', '2023-12-31 08:00'])
+    assert list(result) == [_local('2024-02-15'), _local('2023-12-31'),
+                            _local('2023-12-31'), _local('2023-12-31 08:00')]
+
+
+def test_leap_day_without_year_uses_latest_leap_year():
+    result = _normalize(['02-29', '02-29 08:00', '13-45'], crawl_time=pd.Timestamp('2025-03-10 15:00'))
+    assert list(result[:2]) == [_local('2024-02-29'), _local('2024-02-29 08:00')]
+    assert pd.isna(result[2])
+    # 当年的 02-29 还没到，回退到上一个闰年
+    result = _normalize(['02-29'], crawl_time=pd.Timestamp('2024-01-10'))
+    assert result[0] == _local('2020-02-29')
+
+
+def test_full_api_format_is_converted_to_target_timezone():
+    result = _normalize(['Sat Feb 15 12:30:00 +0000 2025'])
+    assert result[0] == _local('2025-02-15 20:30')
+
+
+def test_unknown_and_missing_values_are_nat():
+    result = _normalize(['不知道', None, '5分钟前'])
+    assert result.isna().tolist() == [True, True, False]
+
+
+def test_per_row_crawl_time():
+    crawl_time = pd.Series(['2024-03-10 15:00:00', '2024-01-01 00:10:00'])
+    result = _normalize(['5分钟前', '5分钟前'], crawl_time=crawl_time)
+    assert list(result) == [_local('2024-03-10 14:55'), _local('2024-01-01 00:05')]
+
+
+def test_add_normalized_time_uses_crawl_column():
+    df = pd.DataFrame({'发布时间': ['昨天 12:30'], '抓取时间': ['2024-03-10 15:00:00']})
+    add_normalized_time(df)
+    assert df['发布时间'][0] == '昨天 12:30'
+    assert df['标准发布时间'][0] == _local('2024-03-09 12:30')